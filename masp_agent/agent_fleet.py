@@ -0,0 +1,299 @@
+"""
+Frota assíncrona de agentes MASP para testes de carga.
+Centenas de agentes em um único event loop: cada um conecta ao tabuleiro com
+socketio.AsyncClient e joga com a estratégia da frota, que segue o ciclo do
+MaspAgent: estratégia padrão implantada de imediato, regras aprendidas no
+oráculo, estratégia gerada e validada, troca só se ela superar a implantada no
+simulador e, no modo residente, regeneração quando a vazão medida cai.
+
+Diferenças em relação ao MaspAgent:
+- O tabuleiro executa uma única estratégia no servidor (o jogador 'ai_agent_masp'),
+  então cada agente da frota move o próprio jogador com 'mover', consultando a
+  tabela de movimentos compilada da estratégia da frota;
+- Geração, validação e compilação são feitas uma vez para a frota, não por agente
+  (todos jogariam o mesmo código), e rodam em uma thread porque o SDK do Gemini e
+  os workers Node.js são síncronos; o event loop continua livre.
+
+As sessões HTTP (pools de conexões), o gerador de estratégias (com cache e
+coalescência) e a tabela de movimentos são compartilhados pela frota.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import socketio
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    aiohttp = None
+
+from agent_masp import outperforms, regeneration_feedback
+from game_rules_context import ORACLE_RESOURCES, GameRulesContext
+from local_engine import BLOCK_SIZE, Board, GameState, greedy_direction
+from strategy_generator import StrategyGenerator
+
+try:
+    from strategy_compiler import MoveTable, compile_strategy, validate_table
+except ImportError:
+    compile_strategy = None
+
+try:
+    from throughput_monitor import ThroughputMonitor
+except ImportError:
+    ThroughputMonitor = None
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        MCP_SERVER_URL = "http://127.0.0.1:8000"
+        REALTIME_GAME_URL = "http://localhost:3000"
+        REQUEST_TIMEOUT = 30
+        CONNECTION_TIMEOUT = 10
+        FLEET_SIZE = 50
+        FLEET_DURATION = 30
+        FLEET_HTTP_CONNECTIONS = 32
+        FLEET_CONNECT_CONCURRENCY = 20
+        AGENT_MODE = "estrategia"
+
+
+class FleetAgent:
+    """Um agente da frota: um socket assíncrono que joga com a estratégia compartilhada"""
+
+    def __init__(self, fleet: 'AgentFleet', index: int):
+        self.fleet = fleet
+        self.index = index
+        self.sio = socketio.AsyncClient(reconnection=False, http_session=fleet.socket_http)
+        self.last_tick: Optional[int] = None
+        self.score = 0
+        self.moves = 0
+        self.updates = 0
+        self.started_at = 0.0
+        self.first_move_ms: Optional[float] = None
+        # Modo residente: cada agente mede a própria vazão, e uma queda regenera a estratégia da frota
+        self.monitor = ThroughputMonitor() if Config.AGENT_MODE == "residente" and ThroughputMonitor else None
+        self.sio.on('update_state', self._on_update_state)
+
+    async def start(self):
+        """Conecta ao tabuleiro; o agente joga assim que recebe o primeiro update_state"""
+        self.started_at = time.perf_counter()
+        async with self.fleet.connect_slots:
+            await self.sio.connect(Config.REALTIME_GAME_URL, transports=['websocket'],
+                                   wait_timeout=Config.CONNECTION_TIMEOUT)
+
+    async def stop(self):
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+    async def _on_update_state(self, state: Dict[str, Any]):
+        self.updates += 1
+        player = state.get('players', {}).get(self.sio.get_sid())
+        if not player:
+            return
+        self.score = player['score']
+
+        # update_state também chega a cada movimento de outro jogador; move no máximo uma vez por tick
+        tick = state.get('tick')
+        if tick is not None and tick == self.last_tick:
+            return
+        self.last_tick = tick
+        if self.monitor and tick is not None and self.monitor.record(tick, self.score):
+            self.fleet.report_regression(self.monitor.points_per_tick(), self.monitor.baseline)
+
+        direction = self.fleet.direction(player['pos'], state['block_pos'])
+        if direction:
+            if self.first_move_ms is None:
+                self.first_move_ms = (time.perf_counter() - self.started_at) * 1000
+            self.moves += 1
+            await self.sio.emit('mover', {'direcao': direction})
+
+
+class AgentFleet:
+    """Hospeda `size` agentes em um event loop, compartilhando conexões, cache e estratégia"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size if size is not None else Config.FLEET_SIZE
+        self.http = None         # Oráculo: pool limitado a FLEET_HTTP_CONNECTIONS
+        self.socket_http = None  # Tabuleiro: cada websocket ocupa uma conexão enquanto viver
+        self.connect_slots: Optional[asyncio.Semaphore] = None
+        self.rules_context = GameRulesContext()
+        self.strategy_generator = StrategyGenerator()
+        # Estratégia implantada na frota (código e tabela); sem tabela, a política gulosa local
+        self.deployed_code: Optional[str] = None
+        self.table: Optional['MoveTable'] = None
+        self.board = Board()
+        self.agents: List[FleetAgent] = []
+        self.rules_learned = False
+        self.regenerations = 0
+        self._regeneration: Optional[asyncio.Task] = None
+
+    async def _fetch(self, path: str) -> Any:
+        async with self.http.get(f"{self.rules_context.mcp_server_url}{path}",
+                                 timeout=aiohttp.ClientTimeout(total=Config.REQUEST_TIMEOUT)) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def learn_rules(self) -> bool:
+        """Consulta ferramentas, regras, mapa e direções do oráculo em paralelo pela sessão compartilhada"""
+        paths = list(ORACLE_RESOURCES)
+        results = await asyncio.gather(*(self._fetch(path) for path in paths), return_exceptions=True)
+        resources = {}
+        for path, result in zip(paths, results):
+            if not isinstance(result, Exception):
+                resources[path] = result
+            elif ORACLE_RESOURCES[path]:
+                print(f"❌ Erro ao conectar-se ao oráculo MCP: {result}")
+                return False
+            else:
+                print(f"⚠️ Não foi possível consultar {path}: {result}")
+        self.rules_context.load_resources(resources)
+        self.rules_learned = True
+        print(f"📚 Regras aprendidas: {len(self.rules_context.game_tools)} ferramentas")
+        return True
+
+    async def _compile(self, js_code: str) -> Optional['MoveTable']:
+        """Compila e valida a estratégia como tabela de movimentos (None se não for possível)"""
+        if compile_strategy is None:
+            return None
+        table = await asyncio.to_thread(compile_strategy, js_code)
+        if table and await asyncio.to_thread(validate_table, table):
+            return table
+        return None
+
+    async def deploy_fallback(self):
+        """Implanta a estratégia padrão de imediato, sem esperar pelo modelo (como o MaspAgent)"""
+        js_code = self.strategy_generator._get_default_strategy()
+        table = await self._compile(js_code)
+        if table is not None:
+            self.table = table
+        self.deployed_code = js_code
+
+    async def build_strategy(self, feedback: str = ""):
+        """Aprende as regras (uma vez), gera, valida e troca a estratégia da frota se ela for melhor"""
+        if not self.rules_learned and not await self.learn_rules():
+            print("⚠️ Regras não aprendidas - a frota mantém a estratégia implantada")
+            return
+        prompt = self.rules_context.get_strategy_prompt() + feedback
+        generator = self.strategy_generator
+        js_code = await asyncio.to_thread(generator.generate_strategy, prompt)
+        if not js_code or not await asyncio.to_thread(generator.validate_strategy, js_code):
+            print("❌ Estratégia gerada é inválida - a frota mantém a estratégia implantada")
+            return
+        if self.deployed_code and not await asyncio.to_thread(outperforms, js_code, self.deployed_code):
+            print("🛡️ Estratégia gerada não supera a implantada - mantendo a estratégia atual")
+            return
+        table = await self._compile(js_code)
+        if table is None:
+            # Os agentes movem pelo próprio socket: sem tabela não há como jogar o código
+            print("⚠️ Estratégia não compilou em tabela - a frota mantém a estratégia implantada")
+            return
+        # Troca a quente: o próximo tick de cada agente já consulta a tabela nova
+        self.table = table
+        self.deployed_code = js_code
+        print("🔁 Nova estratégia implantada na frota")
+
+    def report_regression(self, rate: float, baseline: float):
+        """Chamado por um agente cuja vazão caiu; regenera a estratégia uma vez para a frota"""
+        if self._regeneration is not None and not self._regeneration.done():
+            return
+        print(f"📉 Vazão caiu para {rate:.3f} pontos/tick (referência: {baseline:.3f}) - regenerando estratégia")
+        self.regenerations += 1
+        self._regeneration = asyncio.ensure_future(self._regenerate(rate, baseline))
+
+    async def _regenerate(self, rate: float, baseline: float):
+        try:
+            await self.build_strategy(regeneration_feedback(rate, baseline, self.deployed_code))
+        finally:
+            # Mantendo ou trocando a estratégia, a referência é medida de novo
+            for agent in self.agents:
+                if agent.monitor:
+                    agent.monitor.reset()
+
+    async def _learn_and_deploy(self):
+        await self.deploy_fallback()
+        await self.build_strategy()
+
+    def direction(self, player_pos: List[int], block_pos: List[int]) -> Optional[str]:
+        """Direção da estratégia compartilhada (ou da política gulosa enquanto ela não existe)"""
+        px, py = player_pos
+        bx, by = block_pos[0] // BLOCK_SIZE, block_pos[1] // BLOCK_SIZE
+        if self.table is not None:
+            return self.table.direction(px, py, bx, by)
+        return greedy_direction(self.board, GameState(px, py, bx, by, 0, 0))
+
+    async def run(self, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Conecta todos os agentes, joga por `duration` segundos e desconecta.
+
+        Returns:
+            Dict: Estatísticas agregadas da frota
+        """
+        duration = duration if duration is not None else Config.FLEET_DURATION
+        oracle_connector = aiohttp.TCPConnector(limit=Config.FLEET_HTTP_CONNECTIONS)
+        async with aiohttp.ClientSession(connector=oracle_connector) as http, \
+                aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as socket_http:
+            self.http = http
+            self.socket_http = socket_http
+            self.connect_slots = asyncio.Semaphore(Config.FLEET_CONNECT_CONCURRENCY)
+            agents = self.agents = [FleetAgent(self, i) for i in range(self.size)]
+
+            # Os agentes jogam com a política gulosa até a estratégia padrão compilar, e com ela
+            # até a estratégia gerada ficar pronta
+            strategy = asyncio.ensure_future(self._learn_and_deploy())
+            start = time.perf_counter()
+            results = await asyncio.gather(*(agent.start() for agent in agents), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            print(f"🚀 {self.size - len(errors)}/{self.size} agentes conectados em "
+                  f"{time.perf_counter() - start:.2f} s")
+            if errors:
+                print(f"⚠️ Primeira falha de conexão: {errors[0]!r}")
+
+            await strategy
+            print(f"🧠 Estratégia da frota pronta em {time.perf_counter() - start:.2f} s "
+                  f"({'tabela' if self.table is not None else 'política gulosa'})")
+            await asyncio.sleep(duration)
+            if self._regeneration is not None and not self._regeneration.done():
+                await self._regeneration
+            await asyncio.gather(*(agent.stop() for agent in agents), return_exceptions=True)
+
+        return self._stats(agents, duration, len(errors))
+
+    def _stats(self, agents: List[FleetAgent], duration: float, errors: int) -> Dict[str, Any]:
+        first_moves = sorted(agent.first_move_ms for agent in agents if agent.first_move_ms is not None)
+        return {
+            'agentes': len(agents),
+            'falhas_conexao': errors,
+            'movimentos_por_segundo': sum(agent.moves for agent in agents) / duration,
+            'atualizacoes_por_segundo': sum(agent.updates for agent in agents) / duration,
+            'pontuacao_total': sum(agent.score for agent in agents),
+            'regeneracoes': self.regenerations,
+            'primeiro_movimento_ms_mediana': statistics.median(first_moves) if first_moves else None,
+            'primeiro_movimento_ms_max': first_moves[-1] if first_moves else None,
+            'estrategia': 'tabela' if self.table is not None else 'gulosa'
+        }
+
+
+def main():
+    """Executa uma frota com as configurações do ambiente e imprime as estatísticas"""
+    if not AIOHTTP_AVAILABLE:
+        print("🚨 aiohttp não está instalado: pip install aiohttp")
+        return
+    fleet = AgentFleet()
+    print(f"🛰️ Iniciando frota de {fleet.size} agentes por {Config.FLEET_DURATION:.0f} s...")
+    try:
+        stats = asyncio.run(fleet.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Frota interrompida pelo usuário")
+        return
+    print("📊 Estatísticas da frota:")
+    for key, value in stats.items():
+        print(f"   {key}: {value:.1f}" if isinstance(value, float) else f"   {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,8 @@ O cérebro do sistema que aprende regras e gera estratégias de jogo.
 
 import socketio
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
 
 try:
     from config import Config
@@ -18,6 +19,10 @@ except ImportError:
         MODEL_NAME = "gemini-pro"
         REQUEST_TIMEOUT = 30
         CONNECTION_TIMEOUT = 10
+        AGENT_MODE = "estrategia"
+        BOARD_FPS = 10
+        DEPLOY_TABLE = True
+        SPECULATIVE_DEPLOY = True
         
         @classmethod
         def validate(cls):
@@ -66,7 +71,60 @@ except ImportError:
         
         def validate_strategy(self, js_code):
             return True
+        
+        def warm_up(self):
+            return False
+        
+        def _get_default_strategy(self):
+            return self.generate_strategy("")
 
+try:
+    from strategy_compiler import compile_strategy, score_strategy, validate_table
+except ImportError:
+    compile_strategy = None
+    score_strategy = None
+
+try:
+    from throughput_monitor import ThroughputMonitor
+except ImportError:
+    ThroughputMonitor = None
+
+try:
+    from planner import LookaheadPlanner
+    from local_engine import BLOCK_SIZE
+except ImportError:
+    LookaheadPlanner = None
+    BLOCK_SIZE = 40
+
+# Intervalo entre relatórios do planejador (em decisões)
+PLANNER_REPORT_INTERVAL = 100
+
+
+def outperforms(js_code: str, current_code: str) -> bool:
+    """Compara a estratégia gerada com a implantada no simulador; empates mantêm a implantada"""
+    if js_code.strip() == current_code.strip():
+        return False
+    if score_strategy is None:
+        return True
+    
+    score = score_strategy(js_code)
+    current_score = score_strategy(current_code)
+    if score is None or current_score is None:
+        return score is not None
+    print(f"⚖️ Estratégia gerada: {score:.1f} pontos simulados (implantada: {current_score:.1f})")
+    return score > current_score
+
+
+def regeneration_feedback(rate: float, baseline: float, deployed_code: Optional[str]) -> str:
+    """Trecho do prompt que informa ao modelo o desempenho observado da estratégia atual"""
+    return f"""
+        **Desempenho Observado:**
+        A estratégia atual fez {rate:.3f} pontos por tick no tabuleiro, abaixo dos {baseline:.3f} medidos quando foi implantada:
+        ```javascript
+        {(deployed_code or '').strip()}
+        ```
+        Crie uma estratégia diferente que colete as recompensas mais rápido.
+        """
 
 class MaspAgent:
     """Agente MASP principal que coordena aprendizado e implantação de estratégias"""
@@ -75,6 +133,14 @@ class MaspAgent:
         self.sio = socketio.Client()
         self.rules_context = GameRulesContext()
         self.strategy_generator = StrategyGenerator()
+        self.planner = None
+        self._last_move_time = 0.0
+        self._last_tick: Optional[int] = None
+        self._connected_at = 0.0
+        self._deployed_code: Optional[str] = None
+        # Modo residente: mede a vazão no tabuleiro e regenera a estratégia quando ela cai
+        self.monitor = ThroughputMonitor() if Config.AGENT_MODE == "residente" and ThroughputMonitor else None
+        self._regenerating = False
         self._setup_socket_handlers()
     
     def _setup_socket_handlers(self):
@@ -83,7 +149,20 @@ class MaspAgent:
         @self.sio.event
         def connect():
             print("🔗 Agente conectado ao servidor de jogo.")
-            self._learn_and_deploy_strategy()
+            self._connected_at = time.perf_counter()
+            if Config.AGENT_MODE == "planejador":
+                self._start_planner()
+                return
+            
+            if Config.SPECULATIVE_DEPLOY:
+                self._deploy_fallback()
+        
+        @self.sio.event
+        def update_state(data):
+            if self.planner:
+                self._plan_move(data)
+            elif self.monitor:
+                self._track_throughput(data)
         
         @self.sio.event
         def disconnect():
@@ -92,54 +171,188 @@ class MaspAgent:
         @self.sio.event
         def strategy_deployed(data):
             if data['status'] == 'success':
-                print("✅ Estratégia implantada com sucesso no servidor de jogo!")
+                elapsed_ms = (time.perf_counter() - self._connected_at) * 1000
+                print(f"✅ Estratégia implantada com sucesso no servidor de jogo! "
+                      f"({elapsed_ms:.0f} ms após conectar)")
             else:
                 print(f"❌ Falha ao implantar estratégia: {data.get('error', 'Erro desconhecido')}")
-            # Desconecta após a tentativa de implantação
+            # O agente permanece conectado: ao desconectar o servidor remove o jogador da IA
+    
+    def _deploy_fallback(self):
+        """Implanta a estratégia padrão imediatamente, sem esperar pelo modelo"""
+        print("⚡ Implantando estratégia padrão enquanto a estratégia é gerada...")
+        self._deployed_code = self.strategy_generator._get_default_strategy()
+        self.sio.emit('deploy_strategy', {'code': self._deployed_code})
+    
+    def _abort_learning(self, message: str):
+        """Interrompe o aprendizado, mantendo a estratégia em jogo se já houver uma implantada"""
+        print(message)
+        if self._deployed_code:
+            print("🛡️ Mantendo a estratégia implantada")
+        else:
             self.sio.disconnect()
     
-    def _learn_and_deploy_strategy(self):
+    def _track_throughput(self, state):
+        """Alimenta o monitor de vazão e dispara a regeneração quando a vazão cai"""
+        player = state.get('players', {}).get(Config.AGENT_ID)
+        if not player or 'tick' not in state or self._regenerating:
+            return
+        if not self.monitor.record(state['tick'], player['score']):
+            return
+        
+        rate, baseline = self.monitor.points_per_tick(), self.monitor.baseline
+        print(f"📉 Vazão caiu para {rate:.3f} pontos/tick (referência: {baseline:.3f}) - regenerando estratégia")
+        self._regenerating = True
+        self.sio.start_background_task(self._regenerate_strategy, rate, baseline)
+    
+    def _regenerate_strategy(self, rate: float, baseline: float):
+        """Gera uma nova estratégia informando ao modelo o desempenho observado da atual"""
+        feedback = regeneration_feedback(rate, baseline, self._deployed_code)
+        try:
+            self._learn_and_deploy_strategy(rules_learned=True, feedback=feedback)
+        finally:
+            # Mantendo ou trocando a estratégia, a referência é medida de novo
+            self.monitor.reset()
+            self._regenerating = False
+    
+    def _learn_and_deploy_strategy(self, rules_learned: bool = False, feedback: str = ""):
         """
         Processo principal do agente:
-        1. Aprende as regras do jogo
-        2. Gera uma estratégia
+        1. Aprende as regras do jogo (a menos que a inicialização já tenha aprendido)
+        2. Gera uma estratégia (o feedback, se houver, é acrescentado ao prompt)
         3. Implanta a estratégia no servidor
         """
         try:
             # 1. Aprender regras do jogo
-            if not self.rules_context.learn_rules():
-                print("❌ Falha ao aprender regras do jogo. Abortando...")
-                self.sio.disconnect()
+            if not rules_learned and not self.rules_context.learn_rules():
+                self._abort_learning("❌ Falha ao aprender regras do jogo. Abortando...")
                 return
             
             # 2. Gerar estratégia
-            prompt = self.rules_context.get_strategy_prompt()
+            prompt = self.rules_context.get_strategy_prompt() + feedback
             js_code = self.strategy_generator.generate_strategy(prompt)
             
             if not js_code:
-                print("❌ Falha ao gerar estratégia. Abortando...")
-                self.sio.disconnect()
+                self._abort_learning("❌ Falha ao gerar estratégia. Abortando...")
                 return
             
             # 3. Validar estratégia
             if not self.strategy_generator.validate_strategy(js_code):
-                print("❌ Estratégia gerada é inválida. Abortando...")
-                self.sio.disconnect()
+                self._abort_learning("❌ Estratégia gerada é inválida. Abortando...")
+                return
+            
+            # Com uma estratégia já em jogo, só troca se a gerada for melhor no simulador
+            if self._deployed_code and not outperforms(js_code, self._deployed_code):
+                print("🛡️ Estratégia gerada não supera a implantada - mantendo a estratégia atual")
                 return
             
-            # 4. Implantar estratégia
-            print("🚀 Implantando estratégia no servidor de jogo...")
-            self.sio.emit('deploy_strategy', {'code': js_code})
+            # 4. Implantar estratégia (como tabela de movimentos, se possível)
+            table = None
+            if Config.DEPLOY_TABLE and compile_strategy:
+                table = compile_strategy(js_code)
+                if table and not validate_table(table):
+                    table = None
+            
+            if table:
+                print("🚀 Implantando tabela de movimentos no servidor de jogo...")
+                self.sio.emit('deploy_table', table.to_message())
+            else:
+                print("🚀 Implantando estratégia no servidor de jogo...")
+                self.sio.emit('deploy_strategy', {'code': js_code})
+            self._deployed_code = js_code
             
         except Exception as e:
-            print(f"🔥 Erro inesperado no processo de aprendizado: {e}")
-            self.sio.disconnect()
+            self._abort_learning(f"🔥 Erro inesperado no processo de aprendizado: {e}")
+    
+    def _start_planner(self):
+        """Ativa o modo planejador: o agente decide cada movimento do seu jogador"""
+        if LookaheadPlanner is None:
+            print("⚠️ Planejador não disponível - usando estratégia gerada")
+            self.sio.start_background_task(self._learn_and_deploy_strategy)
+            return
+        self.planner = LookaheadPlanner()
+        print(f"🧭 Planejador ativo (orçamento de {self.planner.budget * 1000:.0f} ms por tick)")
+    
+    def _plan_move(self, state):
+        """Planeja e envia um movimento a partir do estado recebido do tabuleiro"""
+        player = state.get('players', {}).get(self.sio.get_sid())
+        if not player:
+            return
+        
+        # update_state também é emitido após cada movimento; decide no máximo uma vez por tick
+        tick = state.get('tick')
+        now = time.perf_counter()
+        if tick is not None:
+            if tick == self._last_tick:
+                return
+            self._last_tick = tick
+        elif now - self._last_move_time < 0.5 / Config.BOARD_FPS:
+            # Tabuleiro sem contador de ticks: meio período de margem para o atraso entre eventos
+            return
+        
+        block_pos = state['block_pos']
+        reward_pos = (block_pos[0] // BLOCK_SIZE, block_pos[1] // BLOCK_SIZE)
+        
+        direction = self.planner.plan(player['pos'], reward_pos)
+        if direction:
+            self._last_move_time = now
+            self.sio.emit('mover', {'direcao': direction})
+        
+        if self.planner.decisions % PLANNER_REPORT_INTERVAL == 0:
+            stats = self.planner.get_stats()
+            print(f"📈 Planejador: {stats['nos_por_segundo']:.0f} nós/s, "
+                  f"{stats['tempo_medio_ms']:.1f} ms/decisão, "
+                  f"{stats['estouros_orcamento']} estouros de orçamento")
+    
+    def _bootstrap(self) -> bool:
+        """
+        Inicialização concorrente: conecta ao tabuleiro, consulta o oráculo e aquece o
+        modelo em paralelo, então o tempo total é limitado pela etapa mais lenta.
+        
+        Returns:
+            bool: True se as regras do jogo foram aprendidas
+            
+        Raises:
+            socketio.exceptions.ConnectionError: Se não conseguir conectar ao tabuleiro
+        """
+        stages: Dict[str, Callable] = {
+            'tabuleiro': lambda: self.sio.connect(Config.REALTIME_GAME_URL),
+            'oráculo': self.rules_context.learn_rules,
+            'modelo': self.strategy_generator.warm_up
+        }
+        timings: Dict[str, float] = {}
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+            futures = {name: executor.submit(self._timed_stage, timings, name, stage)
+                       for name, stage in stages.items()}
+        total_ms = (time.perf_counter() - start) * 1000
+        
+        breakdown = ' | '.join(f"{name} {timings[name]:.0f} ms" for name in stages)
+        print(f"⏱️ Inicialização em {total_ms:.0f} ms ({breakdown}; "
+              f"sequencial seria {sum(timings.values()):.0f} ms)")
+        
+        futures['tabuleiro'].result()
+        return bool(futures['oráculo'].result())
+    
+    def _timed_stage(self, timings: Dict[str, float], name: str, stage: Callable):
+        """Executa uma etapa da inicialização registrando sua duração em milissegundos"""
+        start = time.perf_counter()
+        try:
+            return stage()
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
     
     def start(self):
         """Inicia o agente MASP"""
         try:
             print("▶️ Iniciando o Agente MASP...")
-            self.sio.connect(Config.REALTIME_GAME_URL)
+            if Config.AGENT_MODE == "planejador":
+                self.sio.connect(Config.REALTIME_GAME_URL)
+            elif self._bootstrap():
+                self._learn_and_deploy_strategy(rules_learned=True)
+            else:
+                self._abort_learning("❌ Falha ao aprender regras do jogo. Abortando...")
             self.sio.wait()  # Mantém o script rodando
             
         except socketio.exceptions.ConnectionError as e:
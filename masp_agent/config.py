@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Optional
 
 # Tenta carregar dotenv se disponível
@@ -19,19 +20,77 @@ class Config:
     MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://127.0.0.1:8000")
     REALTIME_GAME_URL = os.getenv("REALTIME_GAME_URL", "http://localhost:3000")
     
+    # Transporte do oráculo: "http" (API REST) ou "mcp" (canal MCP nativo persistente).
+    # MCP_NATIVE_URL aceita a URL streamable HTTP ou o caminho de mcp_native.py (stdio)
+    ORACLE_TRANSPORT = os.getenv("ORACLE_TRANSPORT", "http")
+    MCP_NATIVE_URL = os.getenv("MCP_NATIVE_URL", "http://127.0.0.1:8001/mcp")
+    
     # Configurações do agente
     AGENT_ID = "ai_agent_masp"
     
     # Configurações do modelo
     MODEL_NAME = "gemini-pro"
+    GENERATION_TEMPERATURE = float(os.getenv("GENERATION_TEMPERATURE", "0.9"))
+    
+    # Streaming da resposta: extrai o bloco de código assim que ele fecha e aborta
+    # se nenhuma direção aparecer nos primeiros STREAM_ABORT_BYTES bytes
+    STREAM_GENERATION = os.getenv("STREAM_GENERATION", "true").lower() == "true"
+    STREAM_ABORT_BYTES = int(os.getenv("STREAM_ABORT_BYTES", "2048"))
+    
+    # Torneio de estratégias: quantas candidatas gerar e quantas chamadas simultâneas ao modelo
+    STRATEGY_CANDIDATES = int(os.getenv("STRATEGY_CANDIDATES", "1"))
+    GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "4"))
     
     # Timeouts
     REQUEST_TIMEOUT = 30
     CONNECTION_TIMEOUT = 10
     
+    # Modo do agente: "estrategia" (implanta código JS), "residente" (implanta e regenera
+    # quando a vazão cai) ou "planejador" (busca a cada tick)
+    AGENT_MODE = os.getenv("AGENT_MODE", "estrategia")
+    
+    # Modo residente: janela (em ticks do tabuleiro) da vazão e queda relativa que dispara regeneração
+    THROUGHPUT_WINDOW_TICKS = int(os.getenv("THROUGHPUT_WINDOW_TICKS", "600"))
+    REGRESSION_THRESHOLD = float(os.getenv("REGRESSION_THRESHOLD", "0.3"))
+    
+    # Cache em disco de estratégias validadas (chave: prompt, modelo e parâmetros de geração)
+    STRATEGY_CACHE_ENABLED = os.getenv("STRATEGY_CACHE_ENABLED", "true").lower() == "true"
+    STRATEGY_CACHE_DIR = os.getenv(
+        "STRATEGY_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".strategy_cache")
+    )
+    STRATEGY_CACHE_MAX_ENTRIES = int(os.getenv("STRATEGY_CACHE_MAX_ENTRIES", "256"))
+    STRATEGY_CACHE_MAX_BYTES = int(os.getenv("STRATEGY_CACHE_MAX_BYTES", str(10 * 1024 * 1024)))
+    STRATEGY_CACHE_MAX_AGE = float(os.getenv("STRATEGY_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    # Locks e resultados das gerações em andamento compartilhadas entre processos
+    SINGLE_FLIGHT_DIR = os.getenv("SINGLE_FLIGHT_DIR", os.path.join(tempfile.gettempdir(), "masp_single_flight"))
+    
+    # Workers Node.js persistentes para compilar e validar estratégias
+    NODE_WORKERS = int(os.getenv("NODE_WORKERS", "2"))
+    
+    # Implanta a estratégia como tabela de movimentos pré-compilada (requer Node.js)
+    DEPLOY_TABLE = os.getenv("DEPLOY_TABLE", "true").lower() == "true"
+    
+    # Implanta a estratégia padrão ao conectar e troca pela gerada quando ela for melhor
+    SPECULATIVE_DEPLOY = os.getenv("SPECULATIVE_DEPLOY", "true").lower() == "true"
+    
+    # Frota assíncrona (agent_fleet.py): agentes por processo, duração em segundos,
+    # conexões HTTP compartilhadas e conexões de socket abertas simultaneamente
+    FLEET_SIZE = int(os.getenv("FLEET_SIZE", "50"))
+    FLEET_DURATION = float(os.getenv("FLEET_DURATION", "30"))
+    FLEET_HTTP_CONNECTIONS = int(os.getenv("FLEET_HTTP_CONNECTIONS", "32"))
+    FLEET_CONNECT_CONCURRENCY = int(os.getenv("FLEET_CONNECT_CONCURRENCY", "20"))
+    
+    # Configurações do planejador
+    BOARD_FPS = 10
+    PLANNER_BUDGET_MS = float(os.getenv("PLANNER_BUDGET_MS", "50"))
+    PLANNER_MAX_DEPTH = int(os.getenv("PLANNER_MAX_DEPTH", "12"))
+    
     @classmethod
     def validate(cls) -> bool:
         """Valida se todas as configurações necessárias estão presentes"""
+        if cls.AGENT_MODE == "planejador":
+            return True  # O planejador não usa o modelo de IA
         if not cls.GEMINI_API_KEY or cls.GEMINI_API_KEY == "SUA_CHAVE_DE_API_AQUI":
             raise ValueError(
                 "Chave de API do Gemini não configurada. "
@@ -47,5 +106,6 @@ class Config:
             "mcp_server_url": cls.MCP_SERVER_URL,
             "realtime_game_url": cls.REALTIME_GAME_URL,
             "model_name": cls.MODEL_NAME,
-            "agent_id": cls.AGENT_ID
+            "agent_id": cls.AGENT_ID,
+            "agent_mode": cls.AGENT_MODE
         } 
\ No newline at end of file
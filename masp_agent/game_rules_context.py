@@ -3,24 +3,172 @@ Módulo para gerenciar o contexto das regras do jogo e comunicação com o orác
 Responsável por aprender e interpretar as regras do jogo.
 """
 
+import asyncio
+import atexit
+import json
+import threading
 import requests
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+try:
+    from fastmcp import Client as MCPClient
+    FASTMCP_AVAILABLE = True
+except ImportError:
+    FASTMCP_AVAILABLE = False
+    MCPClient = None
+
+from local_engine import decode_tile
+
 try:
     from config import Config
 except ImportError:
     # Fallback se config não estiver disponível
     class Config:
         MCP_SERVER_URL = "http://127.0.0.1:8000"
+        MCP_NATIVE_URL = "http://127.0.0.1:8001/mcp"
+        ORACLE_TRANSPORT = "http"
         REQUEST_TIMEOUT = 30
 
+# Janela do mapa incluída no prompt: fixa no canto (0, 0) e sem jogador/recompensa, para que
+# o prompt (e a chave do cache de estratégias) só mude quando paredes ou obstáculos mudarem
+PROMPT_MAP_WINDOW = {'x': 0, 'y': 0, 'largura': 64, 'altura': 64}
+MAP_LAYOUT_PATH = '/mapa?' + '&'.join(f'{name}={value}' for name, value in PROMPT_MAP_WINDOW.items()) + '&posicoes=0'
+
+# Ferramentas descritivas consultadas ao aprender as regras (rota -> obrigatória)
+ORACLE_RESOURCES = {
+    '/tools': True,
+    '/regras_jogo': False,
+    MAP_LAYOUT_PATH: False,
+    '/direcoes_validas': False
+}
+
+# Retentativas com backoff exponencial para falhas de conexão e respostas 502/503/504
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.2
+ORACLE_POOL_SIZE = 8
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+# Respostas já recebidas, por URL: (ETag, JSON); revalidadas com If-None-Match
+_etag_cache: Dict[str, Tuple[str, Any]] = {}
+# Canais MCP abertos no processo, por destino (URL ou script do servidor stdio)
+_mcp_clients: Dict[str, 'OracleMCPClient'] = {}
+
+
+def get_oracle_session() -> requests.Session:
+    """Retorna a sessão HTTP compartilhada do processo (keep-alive, pool e retentativas)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({'GET'})
+            )
+            adapter = HTTPAdapter(pool_maxsize=ORACLE_POOL_SIZE, max_retries=retry)
+            _session = requests.Session()
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+class OracleMCPClient:
+    """
+    Canal MCP persistente com o oráculo (streamable HTTP ou stdio).
+
+    A sessão MCP é aberta uma única vez e fica em um event loop próprio, em uma
+    thread de fundo; as chamadas síncronas de qualquer thread reusam o mesmo canal.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self.tools: List[Dict[str, Any]] = []
+        # Ferramentas cujo resultado estruturado vem embrulhado em {"result": ...}
+        self._wrapped: set = set()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name='oracle-mcp', daemon=True).start()
+        self._client = MCPClient(target, timeout=Config.REQUEST_TIMEOUT)
+        try:
+            self._run(self._client.__aenter__())
+            self._load_tools()
+        except Exception:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(Config.REQUEST_TIMEOUT)
+
+    def _load_tools(self):
+        self.tools = []
+        for tool in self._run(self._client.list_tools()):
+            schema = getattr(tool, 'input_schema', None) or tool.inputSchema
+            output_schema = getattr(tool, 'output_schema', None) or getattr(tool, 'outputSchema', None) or {}
+            if output_schema.get('x-fastmcp-wrap-result'):
+                self._wrapped.add(tool.name)
+            self.tools.append({
+                "name": tool.name,
+                "description": tool.description or "",
+                # `sessao` é opcional: sem ela o canal usa a partida da própria sessão MCP
+                "args": [arg for arg in schema.get('properties', {}) if arg != 'sessao']
+            })
+
+    def call_tool(self, name: str, **args) -> Any:
+        """
+        Chama uma ferramenta pelo canal aberto.
+
+        Returns:
+            Any: Resultado estruturado da ferramenta (dict, lista, int ou str)
+        """
+        result = self._run(self._client.call_tool(name, args))
+        data = result.structured_content
+        if data is None:
+            return result.data
+        return data['result'] if name in self._wrapped else data
+
+    def close(self):
+        """Encerra a sessão MCP e o event loop"""
+        try:
+            self._run(self._client.__aexit__(None, None, None))
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def get_mcp_client(target: Optional[str] = None) -> OracleMCPClient:
+    """Retorna o canal MCP compartilhado do processo para `target` (aberto na primeira chamada)"""
+    if not FASTMCP_AVAILABLE:
+        raise RuntimeError("fastmcp não está instalado: pip install fastmcp")
+    target = target if target is not None else Config.MCP_NATIVE_URL
+    with _session_lock:
+        client = _mcp_clients.get(target)
+        if client is None:
+            client = _mcp_clients[target] = OracleMCPClient(target)
+        return client
+
+
+@atexit.register
+def _close_mcp_clients():
+    for client in _mcp_clients.values():
+        try:
+            client.close()
+        except Exception:
+            pass
+
 
 class GameRulesContext:
     """Gerencia o contexto das regras do jogo obtidas do oráculo MCP"""
     
-    def __init__(self, mcp_server_url: str | None = None):
+    def __init__(self, mcp_server_url: str | None = None, transport: str | None = None):
         self.mcp_server_url = mcp_server_url if mcp_server_url is not None else Config.MCP_SERVER_URL
+        # "http" (API REST) ou "mcp" (canal MCP nativo em Config.MCP_NATIVE_URL)
+        self.transport = transport if transport is not None else Config.ORACLE_TRANSPORT
         self.game_tools = []
         self.tools_description = ""
+        self.rules_text = ""
+        self.map_text = ""
+        self.directions_text = ""
     
     def learn_rules(self) -> bool:
         """
@@ -29,18 +177,27 @@ class GameRulesContext:
         Returns:
             bool: True se conseguiu aprender as regras, False caso contrário
         """
+        if self.transport == "mcp":
+            return self._learn_rules_mcp()
         try:
             print("🧠 Consultando o oráculo MCP para aprender as regras do jogo...")
-            response = requests.get(
-                f"{self.mcp_server_url}/tools",
-                timeout=Config.REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
+            with ThreadPoolExecutor(max_workers=len(ORACLE_RESOURCES)) as executor:
+                futures = {path: executor.submit(self._fetch, path) for path in ORACLE_RESOURCES}
             
-            self.game_tools = response.json()
-            self._build_tools_description()
+            results = {}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except requests.exceptions.RequestException as e:
+                    if ORACLE_RESOURCES[path]:
+                        raise
+                    print(f"⚠️ Não foi possível consultar {path}: {e}")
             
-            print(f"📚 Regras aprendidas com sucesso! {len(self.game_tools)} ferramentas disponíveis.")
+            self.load_resources({path: data for path, (data, _) in results.items()})
+            
+            revalidated = sum(1 for _, not_modified in results.values() if not_modified)
+            print(f"📚 Regras aprendidas com sucesso! {len(self.game_tools)} ferramentas disponíveis "
+                  f"({revalidated}/{len(results)} respostas revalidadas sem alteração).")
             return True
             
         except requests.exceptions.RequestException as e:
@@ -51,6 +208,127 @@ class GameRulesContext:
             print(f"🔥 Erro inesperado ao aprender regras: {e}")
             return False
     
+    def _learn_rules_mcp(self) -> bool:
+        """Aprende as regras pelo canal MCP nativo, com resultados já estruturados"""
+        if not FASTMCP_AVAILABLE:
+            print("🚨 fastmcp não está instalado (pip install fastmcp); use ORACLE_TRANSPORT=http")
+            return False
+        try:
+            print("🧠 Consultando o oráculo pelo canal MCP nativo...")
+            client = get_mcp_client()
+            self.load_tools(client.tools)
+            self.rules_text = client.call_tool("regras_jogo")
+            self.map_text = self._render_map(client.call_tool("mapa", posicoes=False, **PROMPT_MAP_WINDOW))
+            self.directions_text = f"Direções válidas: {', '.join(client.call_tool('direcoes_validas'))}"
+            print(f"📚 Regras aprendidas com sucesso! {len(self.game_tools)} ferramentas disponíveis (MCP).")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao consultar o oráculo MCP nativo: {e}")
+            print(f"   Certifique-se de que o servidor MCP nativo está disponível em {Config.MCP_NATIVE_URL}")
+            return False
+    
+    @staticmethod
+    def _render_map(mapa: Dict[str, Any]) -> str:
+        """Desenha a janela do mapa em tiles no formato de texto do oráculo ('P' jogador e 'R' recompensa, se vierem)"""
+        x0, y0, width, height = mapa["janela"]
+        size = mapa["tamanho_tile"]
+        rows = [['O'] * width for _ in range(height)]
+        for tile in mapa["tiles"]:
+            tile_x, tile_y = tile["tx"] * size, tile["ty"] * size
+            tile_width = min(size, mapa["largura"] - tile_x)
+            tile_height = min(size, mapa["altura"] - tile_y)
+            cells = decode_tile(tile["dados"], mapa["codificacao"], tile_width, tile_height)
+            for index, cell in enumerate(cells):
+                x, y = tile_x + index % tile_width - x0, tile_y + index // tile_width - y0
+                if cell and 0 <= x < width and 0 <= y < height:
+                    rows[y][x] = '#'
+        for key, symbol in (("recompensa", 'R'), ("jogador", 'P')):
+            if key not in mapa:
+                continue
+            x, y = mapa[key]
+            if 0 <= x - x0 < width and 0 <= y - y0 < height:
+                rows[y - y0][x - x0] = symbol
+        return "\n".join("".join(row) for row in rows)
+    
+    def call_tool(self, name: str, **args) -> Any:
+        """
+        Chama uma ferramenta do oráculo pelo canal MCP persistente (requer transporte "mcp").
+        
+        Returns:
+            Any: Resultado estruturado da ferramenta
+        """
+        return get_mcp_client().call_tool(name, **args)
+    
+    def state_events(self, sessao: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Assina o estado de uma sessão do oráculo (SSE em /eventos) em vez de consultá-lo em laço.
+        
+        Args:
+            sessao: ID da sessão (None para a sessão padrão)
+        
+        Yields:
+            Dict: {"jogador", "recompensa", "pontuacao", "tick"} a cada mudança; termina
+            quando a sessão é encerrada ou a conexão cai
+        """
+        params = {'sessao': sessao} if sessao else None
+        with get_oracle_session().get(f"{self.mcp_server_url}/eventos", params=params, stream=True,
+                                      timeout=(Config.REQUEST_TIMEOUT, None)) as response:
+            response.raise_for_status()
+            event, data = None, []
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if line:
+                    field, _, value = line.partition(':')
+                    if field == 'event':
+                        event = value.strip()
+                    elif field == 'data':
+                        data.append(value.strip())
+                    continue
+                # Linha em branco: fim do evento (comentários de keepalive não têm campos)
+                if event == 'encerrada':
+                    return
+                if event == 'estado' and data:
+                    yield json.loads("\n".join(data))
+                event, data = None, []
+    
+    def _fetch(self, path: str) -> Tuple[Any, bool]:
+        """
+        Consulta uma rota do oráculo, revalidando a resposta anterior pelo ETag.
+        
+        Returns:
+            Tuple[Any, bool]: (JSON da resposta, True se o oráculo respondeu 304)
+        """
+        url = f"{self.mcp_server_url}{path}"
+        cached = _etag_cache.get(url)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        
+        response = get_oracle_session().get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT)
+        if response.status_code == 304 and cached:
+            return cached[1], True
+        response.raise_for_status()
+        
+        data = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            _etag_cache[url] = (etag, data)
+        return data, False
+    
+    def load_resources(self, resources: Dict[str, Any]):
+        """
+        Carrega as respostas já obtidas das rotas de ORACLE_RESOURCES (ex.: por um cliente assíncrono).
+        
+        Args:
+            resources: JSON por rota; as rotas opcionais podem faltar
+        """
+        self.load_tools(resources['/tools'])
+        self.rules_text = resources.get('/regras_jogo', {}).get('regras', '').strip()
+        self.map_text = resources.get(MAP_LAYOUT_PATH, {}).get('mapa', '').strip()
+        self.directions_text = resources.get('/direcoes_validas', {}).get('direcoes', '').strip()
+    
+    def load_tools(self, tools: List[Dict[str, Any]]):
+        """Carrega a lista de ferramentas já obtida do oráculo (ex.: por um cliente assíncrono)"""
+        self.game_tools = tools
+        self._build_tools_description()
+    
     def _build_tools_description(self):
         """Constrói a descrição das ferramentas disponíveis"""
         descriptions = []
@@ -77,6 +355,7 @@ class GameRulesContext:
         **Regras e Ferramentas Disponíveis (via API):**
         {self.tools_description}
         O mapa tem coordenadas onde (0,0) é o canto superior esquerdo.
+        {self._build_oracle_context()}
 
         **Sua Tarefa:**
         Crie uma função JavaScript que receba a posição do jogador `playerPos` (um objeto com `x` e `y`) e a posição da recompensa `rewardPos` (também com `x` e `y`) e retorne a próxima melhor direção para o jogador se mover.
@@ -85,9 +364,8 @@ class GameRulesContext:
         **Requisitos da Estratégia:**
         - A lógica deve ser contida em uma única função.
         - A função deve ser eficiente e direta.
-        - A estratégia deve ser inteligente: mova-se na direção horizontal e depois na vertical (ou vice-versa) para alcançar a recompensa.
+        {self._movement_requirements()}
         - Evite movimentos diagonais, pois não são permitidos.
-        - Considere a distância Manhattan para otimizar o caminho.
 
         **Formato da Saída:**
         Retorne APENAS o corpo da função JavaScript, sem a declaração `function(...) {{ ... }}`.
@@ -111,6 +389,45 @@ class GameRulesContext:
         Agora, crie o corpo da função JavaScript com base na sua análise das regras do jogo.
         """
     
+    def has_obstacles(self) -> bool:
+        """Verifica se o mapa aprendido tem paredes no interior (fora das linhas e colunas só de paredes da borda)"""
+        rows = [line.strip() for line in self.map_text.splitlines()]
+        rows = [row for row in rows if row and set(row) <= set('#OPR')]
+        while rows and set(rows[0]) == {'#'}:
+            rows.pop(0)
+        while rows and set(rows[-1]) == {'#'}:
+            rows.pop()
+        if rows and all(row[0] == '#' for row in rows):
+            rows = [row[1:] for row in rows]
+        if rows and all(row and row[-1] == '#' for row in rows):
+            rows = [row[:-1] for row in rows]
+        return any('#' in row for row in rows)
+    
+    def _movement_requirements(self) -> str:
+        """Como a estratégia deve se mover: gulosa no mapa aberto, busca de caminho com obstáculos"""
+        if self.has_obstacles():
+            return (
+                "- O mapa tem obstáculos ('#' no interior): seguir só a distância Manhattan trava atrás deles.\n"
+                "        - Inclua na função as posições dos obstáculos do mapa e escolha a direção por uma busca em "
+                "largura (BFS) da recompensa até o jogador; o oráculo faz o mesmo cálculo na ferramenta `melhor_direcao`."
+            )
+        return (
+            "- A estratégia deve ser inteligente: mova-se na direção horizontal e depois na vertical "
+            "(ou vice-versa) para alcançar a recompensa.\n"
+            "        - Considere a distância Manhattan para otimizar o caminho."
+        )
+    
+    def _build_oracle_context(self) -> str:
+        """Regras, mapa e direções válidas consultados no oráculo, para o prompt"""
+        sections = []
+        if self.rules_text:
+            sections.append(f"**Regras do Jogo (do oráculo):**\n{self.rules_text}")
+        if self.map_text:
+            sections.append(f"**Mapa (paredes '#' e células livres 'O'):**\n{self.map_text}")
+        if self.directions_text:
+            sections.append(self.directions_text)
+        return "\n\n".join(sections)
+    
     def get_tools(self) -> List[Dict[str, Any]]:
         """Retorna a lista de ferramentas disponíveis"""
         return self.game_tools
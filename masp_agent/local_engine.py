@@ -0,0 +1,24 @@
+"""
+Espelho local do motor do Oráculo.
+Importa `mcp_server/game_engine.py` para que o agente simule o jogo sem
+depender de chamadas HTTP ao servidor MCP.
+"""
+
+import os
+import sys
+
+try:
+    from game_engine import (
+        BLOCK_SIZE, DIRECTIONS, Board, GameState, SimpleGameEngine, apply_move, greedy_direction
+    )
+    from map_tiles import decode_tile
+except ImportError:
+    # Executando a partir de masp_agent/: o motor está no diretório irmão mcp_server/
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mcp_server'))
+    from game_engine import (
+        BLOCK_SIZE, DIRECTIONS, Board, GameState, SimpleGameEngine, apply_move, greedy_direction
+    )
+    from map_tiles import decode_tile
+
+# Simulação vetorizada (NumPy opcional: sem ela, VectorEnv levanta ImportError)
+from vector_env import NUMPY_AVAILABLE, VectorEnv, table_policy
@@ -0,0 +1,146 @@
+"""
+Pool de workers Node.js de longa duração para compilar e validar estratégias.
+Cada worker executa `strategy_worker.js` e troca uma linha JSON por requisição
+pelo stdin/stdout, então validar uma estratégia não paga o custo de iniciar o Node.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        NODE_WORKERS = 2
+
+# Script Node.js que compila estratégias como GameManager.deployAIStrategy
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategy_worker.js')
+NODE_BINARY = shutil.which('node')
+
+# Tempo máximo de uma requisição; estratégias em loop infinito derrubam o worker
+WORKER_TIMEOUT = 5
+
+
+class NodeWorker:
+    """Um processo Node.js persistente executando o strategy_worker.js"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [NODE_BINARY, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        self.lines: queue.Queue = queue.Queue()
+        self._reader = threading.Thread(target=self._read_lines, daemon=True)
+        self._reader.start()
+
+    def _read_lines(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        # stdout fechado: o worker morreu, e quem espera uma resposta falha na hora
+        self.lines.put(None)
+
+    def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Envia uma requisição e aguarda a resposta correspondente.
+
+        Raises:
+            queue.Empty: Se o worker não responder dentro de `timeout`
+            OSError: Se o processo tiver morrido
+        """
+        self.process.stdin.write(json.dumps(payload) + '\n')
+        self.process.stdin.flush()
+        while True:
+            line = self.lines.get(timeout=timeout)
+            if line is None:
+                self.lines.put(None)
+                raise OSError(f"worker Node.js terminou (código {self.process.poll()})")
+            response = json.loads(line)
+            if response.get('id') == payload['id']:
+                return response
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class NodeWorkerPool:
+    """Distribui requisições entre workers Node.js aquecidos, substituindo os que falham"""
+
+    def __init__(self, size: Optional[int] = None, timeout: float = WORKER_TIMEOUT):
+        self.size = size if size is not None else Config.NODE_WORKERS
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(NodeWorker())
+
+    def submit(self, op: str, **fields) -> Optional[Dict[str, Any]]:
+        """
+        Executa uma operação do worker ('compile' ou 'validate').
+
+        Returns:
+            Dict: Resposta do worker, ou None se ele travou ou morreu
+        """
+        payload = {'id': next(self._ids), 'op': op, **fields}
+        # Uma vaga None é um worker que não pôde ser iniciado: tenta de novo agora
+        worker = self._idle.get() or self._spawn()
+        if worker is None:
+            self._idle.put(None)
+            return None
+        try:
+            return worker.request(payload, self.timeout)
+        except (queue.Empty, OSError, ValueError) as e:
+            print(f"⚠️ Worker Node.js não respondeu ({type(e).__name__}); reiniciando worker")
+            worker.close()
+            worker = self._spawn()
+            return None
+        finally:
+            # Só workers vivos voltam à fila; sem substituto, a vaga fica vazia até a próxima requisição
+            self._idle.put(worker)
+
+    @staticmethod
+    def _spawn() -> Optional[NodeWorker]:
+        """Inicia um worker novo (None se o processo não puder ser criado)"""
+        try:
+            return NodeWorker()
+        except OSError as e:
+            print(f"⚠️ Não foi possível iniciar worker Node.js: {e}")
+            return None
+
+    def close(self):
+        """Encerra todos os workers ociosos"""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+
+_pool: Optional[NodeWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> Optional[NodeWorkerPool]:
+    """Retorna o pool compartilhado do processo, criando-o na primeira chamada (None sem Node.js)"""
+    global _pool
+    if not NODE_BINARY:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = NodeWorkerPool()
+            atexit.register(_pool.close)
+        return _pool
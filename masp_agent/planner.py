@@ -0,0 +1,128 @@
+"""
+Planejador com busca à frente (lookahead) e orçamento de tempo por tick.
+Alternativa às estratégias geradas pela IA: decide cada movimento buscando
+no espelho local do motor do Oráculo, dentro do tick de 100 ms do tabuleiro.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from local_engine import DIRECTIONS, Board, GameState, SimpleGameEngine
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        PLANNER_BUDGET_MS = 50
+        PLANNER_MAX_DEPTH = 12
+
+# Valor de coletar a recompensa; descontado pela profundidade em que ocorre
+REWARD_VALUE = 1000
+# Frequência (em nós) das checagens de tempo durante a busca
+DEADLINE_CHECK_INTERVAL = 32
+# Fração do orçamento usada na busca; o resto cobre a finalização da decisão
+SEARCH_BUDGET_FRACTION = 0.9
+
+
+class _BudgetExceeded(Exception):
+    """Interrompe a busca quando o orçamento do tick acaba"""
+
+
+class LookaheadPlanner:
+    """Busca em profundidade iterativa sobre o motor local, limitada por tempo"""
+
+    def __init__(self, board: Optional[Board] = None, budget_ms: Optional[float] = None,
+                 max_depth: Optional[int] = None):
+        self.engine = SimpleGameEngine(board)
+        self.budget = (budget_ms if budget_ms is not None else Config.PLANNER_BUDGET_MS) / 1000
+        self.max_depth = max_depth if max_depth is not None else Config.PLANNER_MAX_DEPTH
+        self.directions = list(DIRECTIONS)
+        self._deadline = 0.0
+        self._nodes = 0
+
+        # Estatísticas acumuladas
+        self.decisions = 0
+        self.total_nodes = 0
+        self.total_time = 0.0
+        self.overruns = 0
+
+    def plan(self, player_pos, reward_pos) -> Optional[str]:
+        """
+        Escolhe a próxima direção para o jogador dentro do orçamento de tempo.
+
+        Args:
+            player_pos: Posição (x, y) do jogador
+            reward_pos: Posição (x, y) da recompensa
+
+        Returns:
+            str: Melhor direção encontrada, ou None se já estiver na recompensa
+        """
+        start = time.perf_counter()
+        self._deadline = start + self.budget * SEARCH_BUDGET_FRACTION
+        self._nodes = 0
+
+        px, py = player_pos
+        bx, by = reward_pos
+        root = GameState(px, py, bx, by, 0, self.engine.state.rng)
+        self.engine.restore(root)
+
+        best_move = None
+        if (px, py) != (bx, by):
+            # Aprofundamento iterativo: mantém o melhor movimento da última profundidade completa
+            for depth in range(1, self.max_depth + 1):
+                try:
+                    move, value = self._search_root(root, depth)
+                except _BudgetExceeded:
+                    break
+                best_move = move
+                if value > 0:
+                    break  # Caminho até a recompensa encontrado; aprofundar não muda a escolha
+
+        elapsed = time.perf_counter() - start
+        self.decisions += 1
+        self.total_nodes += self._nodes
+        self.total_time += elapsed
+        if elapsed > self.budget:
+            self.overruns += 1
+        return best_move
+
+    def _search_root(self, root: GameState, depth: int):
+        best_move, best_value = None, float('-inf')
+        for direction in self.directions:
+            self.engine.restore(root)
+            value = self._search(direction, depth, 1)
+            if value > best_value:
+                best_move, best_value = direction, value
+        return best_move, best_value
+
+    def _search(self, direction: str, depth: int, ply: int) -> float:
+        """Aplica `direction` no motor e avalia a subárvore resultante"""
+        self._nodes += 1
+        if self._nodes % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+
+        engine = self.engine
+        before = engine.snapshot()
+        gained = engine.step(direction)
+        state = engine.state
+        if gained:
+            return REWARD_VALUE - ply
+        if (state.px, state.py) == (before.px, before.py):
+            return float('-inf')  # Bateu na parede: movimento desperdiçado
+        if ply == depth:
+            return -(abs(state.bx - state.px) + abs(state.by - state.py)) - ply
+
+        best = float('-inf')
+        for next_direction in self.directions:
+            engine.restore(state)
+            best = max(best, self._search(next_direction, depth, ply + 1))
+        return best
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna nós por segundo, tempo médio por decisão e estouros de orçamento"""
+        return {
+            "decisoes": self.decisions,
+            "nos_por_segundo": self.total_nodes / self.total_time if self.total_time else 0.0,
+            "tempo_medio_ms": self.total_time / self.decisions * 1000 if self.decisions else 0.0,
+            "estouros_orcamento": self.overruns
+        }
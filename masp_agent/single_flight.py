@@ -0,0 +1,156 @@
+"""
+Coalescência de chamadas idênticas em andamento (single-flight).
+Chamadores simultâneos com a mesma chave compartilham uma única execução:
+entre threads pelo mesmo Future e entre processos por um lock de arquivo. O
+processo que executou grava o resultado ao lado do lock, e quem esperava pelo
+lock o lê em vez de executar de novo.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows) a coalescência fica restrita às threads do processo
+    fcntl = None
+
+LOCK_SUFFIX = '.lock'
+RESULT_SUFFIX = '.result'
+# Locks e resultados mais antigos que isso são removidos (nenhuma execução dura tanto)
+FILE_MAX_AGE = 3600
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """Executa `fn` uma vez por chave enquanto houver chamadas simultâneas para ela"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], lock_dir: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        Executa `fn` ou aguarda a execução em andamento para a mesma chave.
+
+        Args:
+            key: Identificador da chamada (ex.: hash do prompt)
+            fn: Função sem argumentos que produz o resultado (serializável em JSON para
+                ser compartilhado entre processos)
+            lock_dir: Diretório dos locks entre processos (None coalesce só entre threads)
+
+        Returns:
+            Tuple[Any, bool]: (resultado, True se foi compartilhado de outra chamada)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result, shared = self._run_exclusive(key, fn, lock_dir)
+            future.set_result(result)
+            return result, shared
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def _run_exclusive(self, key: str, fn: Callable[[], Any], lock_dir: Optional[str]) -> Tuple[Any, bool]:
+        """Executa `fn` sob o lock do processo, ou reaproveita o resultado de quem o segurava"""
+        if lock_dir is None or fcntl is None:
+            return fn(), False
+
+        os.makedirs(lock_dir, exist_ok=True)
+        result_path = os.path.join(lock_dir, key + RESULT_SUFFIX)
+        waiting_since = time.time()
+        with self._process_lock(os.path.join(lock_dir, key + LOCK_SUFFIX)):
+            # Um resultado gravado enquanto esperávamos é de uma execução simultânea a esta
+            result = _read_result(result_path, waiting_since)
+            if result is not _MISSING:
+                return result, True
+            result = fn()
+            _write_result(lock_dir, result_path, result)
+        _remove_stale(lock_dir)
+        return result, False
+
+    @staticmethod
+    @contextmanager
+    def _process_lock(path: str):
+        """Lock exclusivo em `path` compartilhado entre processos da mesma máquina"""
+        while True:
+            lock_file = open(path, 'a')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                same_file = os.path.samestat(os.fstat(lock_file.fileno()), os.stat(path))
+            except OSError:
+                same_file = False
+            if same_file:
+                break
+            # O arquivo foi removido como antigo enquanto esperávamos: trava o novo
+            lock_file.close()
+        try:
+            os.utime(path)
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+
+def _read_result(path: str, since: float) -> Any:
+    """Resultado gravado em `path` a partir do instante `since` (_MISSING se não houver)"""
+    try:
+        if os.stat(path).st_mtime < since:
+            return _MISSING
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return _MISSING
+
+
+def _write_result(directory: str, path: str, result: Any):
+    """Grava o resultado de forma atômica para os processos que esperam pelo lock"""
+    try:
+        data = json.dumps(result, ensure_ascii=False)
+    except (TypeError, ValueError):
+        # Resultado não serializável: quem esperava executa por conta própria
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Não foi possível compartilhar o resultado entre processos: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _remove_stale(directory: str):
+    """Remove locks e resultados de execuções antigas"""
+    now = time.time()
+    for name in os.listdir(directory):
+        if not name.endswith((LOCK_SUFFIX, RESULT_SUFFIX)):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.stat(path).st_mtime > FILE_MAX_AGE:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,115 @@
+"""
+Cache em disco de estratégias geradas, endereçado por conteúdo.
+A chave é o hash do prompt, do modelo e dos parâmetros de geração; cada entrada
+guarda o código já extraído e validado junto com sua pontuação simulada.
+Entradas expiram por idade e as menos usadas são removidas quando o cache excede
+o limite de entradas ou de bytes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        STRATEGY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.strategy_cache')
+        STRATEGY_CACHE_MAX_ENTRIES = 256
+        STRATEGY_CACHE_MAX_BYTES = 10 * 1024 * 1024
+        STRATEGY_CACHE_MAX_AGE = 7 * 24 * 3600
+
+CACHE_SUFFIX = '.json'
+
+
+def make_cache_key(prompt: str, model_name: str, params: Dict[str, Any]) -> str:
+    """Calcula a chave (sha256) de uma geração a partir do prompt, modelo e parâmetros"""
+    material = json.dumps([prompt, model_name, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class StrategyCache:
+    """Cache LRU em disco: um arquivo JSON por chave; o mtime marca o último acesso"""
+
+    def __init__(self, directory: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        self.directory = directory if directory is not None else Config.STRATEGY_CACHE_DIR
+        self.max_entries = max_entries if max_entries is not None else Config.STRATEGY_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else Config.STRATEGY_CACHE_MAX_BYTES
+        self.max_age = max_age if max_age is not None else Config.STRATEGY_CACHE_MAX_AGE
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma entrada e marca o acesso.
+
+        Returns:
+            Dict: {"code", "score", "model", "created_at"}, ou None se ausente ou expirada
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get('created_at', 0) > self.max_age:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, code: str, score: float, model_name: str):
+        """Grava uma estratégia validada de forma atômica e aplica a política de remoção"""
+        entry = {'code': code, 'score': score, 'model': model_name, 'created_at': time.time()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar no cache de estratégias: {e}")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove entradas expiradas e, depois, as menos usadas até caber nos limites"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # O mtime nunca é anterior à criação, então entradas com mtime vencido estão expiradas
+            if now - stat.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            total_bytes -= size
+            self._remove(path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,143 @@
+"""
+Compilador de estratégias em tabelas de movimentos.
+Avalia uma estratégia JavaScript em todos os pares (jogador, recompensa) do
+tabuleiro e gera uma tabela densa de direções, validada no motor local, que o
+tabuleiro consulta com um único acesso a array por tick. Com NumPy, a
+pontuação roda a tabela em milhares de partidas paralelas no VectorEnv.
+"""
+
+from typing import Any, Dict, Optional
+
+from local_engine import DIRECTIONS, NUMPY_AVAILABLE, Board, GameState, SimpleGameEngine, VectorEnv, table_policy
+from node_worker_pool import get_worker_pool
+
+# Códigos da tabela: índice em DIRECTIONS, ou NOOP quando a estratégia não se move
+DIRECTION_NAMES = list(DIRECTIONS)
+NOOP = len(DIRECTION_NAMES)
+
+VALIDATION_TICKS = 1000
+# Sementes usadas para pontuar estratégias sem NumPy (média entre partidas simuladas)
+SCORING_SEEDS = range(8)
+# Partidas paralelas usadas para pontuar estratégias com NumPy (4096 x 1000 ticks)
+SCORING_ENVS = 4096
+
+
+class MoveTable:
+    """Tabela densa de direções indexada por (célula do jogador, célula da recompensa)"""
+
+    __slots__ = ('cols', 'rows', 'codes', 'exceptions', 'invalid')
+
+    def __init__(self, cols: int, rows: int, codes: bytes, exceptions: int = 0, invalid: int = 0):
+        self.cols = cols
+        self.rows = rows
+        self.codes = codes
+        self.exceptions = exceptions
+        self.invalid = invalid
+
+    @classmethod
+    def from_encoded(cls, cols: int, rows: int, table: str, **counts) -> 'MoveTable':
+        """Cria a tabela a partir da string de dígitos usada no protocolo"""
+        return cls(cols, rows, bytes(ord(c) - 48 for c in table), **counts)
+
+    def encode(self) -> str:
+        """Codifica a tabela como string de dígitos (um por par)"""
+        return bytes(code + 48 for code in self.codes).decode('ascii')
+
+    def direction(self, px: int, py: int, bx: int, by: int) -> Optional[str]:
+        """Consulta a direção para o jogador em (px, py) e a recompensa em (bx, by)"""
+        cells = self.cols * self.rows
+        code = self.codes[(py * self.cols + px) * cells + by * self.cols + bx]
+        return DIRECTION_NAMES[code] if code < NOOP else None
+
+    def policy(self, board: Board, state: GameState) -> Optional[str]:
+        """Política compatível com SimpleGameEngine.rollout"""
+        return self.direction(state.px, state.py, state.bx, state.by)
+
+    def to_message(self) -> Dict[str, Any]:
+        """Payload do evento 'deploy_table' do tabuleiro"""
+        return {'table': self.encode(), 'cols': self.cols, 'rows': self.rows}
+
+
+def compile_strategy(js_code: str, board: Optional[Board] = None) -> Optional[MoveTable]:
+    """
+    Compila uma estratégia JavaScript em uma tabela de movimentos usando o Node.js.
+
+    Args:
+        js_code: Corpo da função da estratégia
+        board: Tabuleiro alvo (padrão 10x10)
+
+    Returns:
+        MoveTable: Tabela compilada, ou None se o Node.js não estiver disponível ou a compilação falhar
+    """
+    board = board if board is not None else Board()
+    pool = get_worker_pool()
+    if pool is None:
+        print("⚠️ Node.js não encontrado - não é possível compilar a tabela de movimentos")
+        return None
+
+    response = pool.submit('compile', code=js_code, cols=board.cols, rows=board.rows)
+    if response is None:
+        print("❌ Falha ao compilar a tabela de movimentos: worker Node.js não respondeu")
+        return None
+
+    if not response['ok']:
+        print(f"❌ Estratégia não compila: {response['error']}")
+        return None
+
+    table = MoveTable.from_encoded(
+        board.cols, board.rows, response['table'],
+        exceptions=response['exceptions'], invalid=response['invalid']
+    )
+    if table.exceptions or table.invalid:
+        print(f"⚠️ Estratégia lançou {table.exceptions} exceções e retornou {table.invalid} "
+              f"direções inválidas; essas posições ficam paradas na tabela")
+    return table
+
+
+def simulate_table(table: MoveTable, ticks: int = VALIDATION_TICKS, seed: Optional[int] = 0) -> int:
+    """Executa a tabela no motor local por `ticks` ticks e retorna a pontuação"""
+    engine = SimpleGameEngine(Board(table.cols, table.rows), seed=seed)
+    engine.rollout(steps=ticks, policy=table.policy)
+    return engine.get_score()
+
+
+def validate_table(table: MoveTable, ticks: int = VALIDATION_TICKS) -> bool:
+    """
+    Valida a tabela no simulador: ela precisa coletar recompensas.
+
+    Returns:
+        bool: True se a tabela pontuou na simulação
+    """
+    score = simulate_table(table, ticks)
+    if score <= 0:
+        print(f"❌ Tabela de movimentos não pontuou em {ticks} ticks simulados")
+        return False
+    print(f"✅ Tabela de movimentos validada: {score} pontos em {ticks} ticks simulados")
+    return True
+
+
+def score_table(table: MoveTable, ticks: int = VALIDATION_TICKS, board: Optional[Board] = None) -> float:
+    """
+    Média de pontos da tabela em várias partidas de `ticks` ticks.
+
+    Com NumPy, roda SCORING_ENVS partidas em paralelo no VectorEnv (milhões de ticks
+    em uma fração de segundo); sem ela, uma partida por semente no motor local.
+    """
+    if NUMPY_AVAILABLE:
+        env = VectorEnv(SCORING_ENVS, board if board is not None else Board(table.cols, table.rows), seed=0)
+        return float(env.evaluate(table_policy(table.codes, table.cols, table.rows), ticks).mean())
+    return sum(simulate_table(table, ticks, seed) for seed in SCORING_SEEDS) / len(SCORING_SEEDS)
+
+
+def score_strategy(js_code: str, board: Optional[Board] = None,
+                   ticks: int = VALIDATION_TICKS) -> Optional[float]:
+    """
+    Pontua uma estratégia no simulador: média de pontos em várias partidas de `ticks` ticks.
+
+    Returns:
+        float: Pontuação média, ou None se a estratégia não puder ser compilada
+    """
+    table = compile_strategy(js_code, board)
+    if table is None:
+        return None
+    return score_table(table, ticks, board)
@@ -3,7 +3,12 @@ Módulo para gerar estratégias de jogo usando modelos de IA.
 Responsável por criar e otimizar estratégias baseadas nas regras aprendidas.
 """
 
-from typing import Optional
+import hashlib
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 try:
     import google.generativeai as genai
     GEMINI_AVAILABLE = True
@@ -11,6 +16,24 @@ except ImportError:
     GEMINI_AVAILABLE = False
     genai = None
 
+try:
+    from node_worker_pool import get_worker_pool
+except ImportError:
+    get_worker_pool = None
+
+try:
+    from strategy_compiler import score_strategy
+except ImportError:
+    score_strategy = None
+
+try:
+    from strategy_cache import StrategyCache, make_cache_key
+except ImportError:
+    StrategyCache = None
+    make_cache_key = None
+
+from single_flight import SingleFlight
+
 try:
     from config import Config
 except ImportError:
@@ -18,18 +41,81 @@ except ImportError:
     class Config:
         GEMINI_API_KEY = ""
         MODEL_NAME = "gemini-pro"
+        GENERATION_TEMPERATURE = 0.9
+        STREAM_GENERATION = True
+        STREAM_ABORT_BYTES = 2048
+        STRATEGY_CANDIDATES = 1
+        GENERATION_CONCURRENCY = 4
+        STRATEGY_CACHE_ENABLED = False
+        SINGLE_FLIGHT_DIR = None
+
+# Gerações em andamento do processo, compartilhadas entre todas as instâncias
+_generation_flight = SingleFlight()
+
+# Tokens que toda estratégia válida precisa conter
+DIRECTION_TOKENS = ('up', 'down', 'left', 'right')
+# Bloco de código markdown completo (cerca de abertura, corpo, cerca de fechamento)
+FENCED_BLOCK = re.compile(r"```[\w-]*\n(.*?)```", re.DOTALL)
+
+# Posições de teste da validação: pares (jogador, recompensa) no interior do tabuleiro 10x10
+BOARD_INTERIOR = range(1, 9)
+VALIDATION_SAMPLES = 256
+# Fração mínima das posições de teste em que o movimento aproxima o jogador da recompensa
+MIN_PROGRESS_RATIO = 0.5
+
+
+def build_test_positions(samples: int = VALIDATION_SAMPLES, seed: int = 0) -> List[List[int]]:
+    """Gera um lote determinístico de posições [px, py, rx, ry] com jogador fora da recompensa"""
+    rng = random.Random(seed)
+    corners = [1, BOARD_INTERIOR[-1]]
+    positions = [[px, py, rx, ry] for px in corners for py in corners
+                 for rx in corners for ry in corners if (px, py) != (rx, ry)]
+    while len(positions) < samples:
+        px, py, rx, ry = (rng.choice(BOARD_INTERIOR) for _ in range(4))
+        if (px, py) != (rx, ry):
+            positions.append([px, py, rx, ry])
+    return positions
 
 
 class StrategyGenerator:
     """Gerencia a geração de estratégias usando modelos de IA"""
     
     def __init__(self):
-        if GEMINI_AVAILABLE:
+        # O cliente do modelo é configurado em warm_up(), chamado na inicialização do agente
+        # ou, no máximo, na primeira geração
+        self.model = None
+        self._warmed_up = False
+        self._warm_up_lock = threading.Lock()
+        self.cache = StrategyCache() if StrategyCache and Config.STRATEGY_CACHE_ENABLED else None
+    
+    def warm_up(self) -> bool:
+        """
+        Configura o cliente do modelo, abre a conexão com a API e inicia os workers Node.js.
+        Idempotente: chamadas seguintes retornam imediatamente.
+        
+        Returns:
+            bool: True se o modelo está disponível
+        """
+        with self._warm_up_lock:
+            if self._warmed_up:
+                return self.model is not None
+            self._warmed_up = True
+            
+            if get_worker_pool:
+                get_worker_pool()
+            
+            if not GEMINI_AVAILABLE:
+                print("⚠️ Google Gemini não disponível - usando estratégia padrão")
+                return False
+            
             genai.configure(api_key=Config.GEMINI_API_KEY)
             self.model = genai.GenerativeModel(Config.MODEL_NAME)
-        else:
-            self.model = None
-            print("⚠️ Google Gemini não disponível - usando estratégia padrão")
+            try:
+                # Contar tokens abre a conexão com a API sem gerar nenhum token
+                self.model.count_tokens("ping")
+            except Exception as e:
+                print(f"⚠️ Não foi possível aquecer o cliente do modelo: {e}")
+            return True
     
     def generate_strategy(self, prompt: str) -> Optional[str]:
         """
@@ -44,28 +130,199 @@ class StrategyGenerator:
         try:
             print("💡 Gerando estratégia com a API Gemini...")
             
-            if not GEMINI_AVAILABLE or not self.model:
+            if not self.warm_up():
                 print("⚠️ Usando estratégia padrão (Gemini não disponível)")
                 return self._get_default_strategy()
             
-            response = self.model.generate_content(prompt)
+            cache_key = self._cache_key(prompt)
+            cached = self._cached_strategy(cache_key)
+            if cached:
+                return cached
             
-            # Limpa a resposta para extrair apenas o código
-            js_code = self._extract_js_code(response.text)
-            
-            if js_code:
-                print("✨ Estratégia gerada com sucesso!")
-                print(f"📝 Código gerado:\n{js_code}")
-                return js_code
-            else:
-                print("❌ Não foi possível extrair código JavaScript da resposta")
-                return self._get_default_strategy()
+            # Chamadas idênticas simultâneas (threads ou processos) compartilham uma única geração,
+            # com ou sem o cache de estratégias
+            js_code, shared = _generation_flight.do(
+                cache_key, lambda: self._generate_uncached(prompt, cache_key), Config.SINGLE_FLIGHT_DIR
+            )
+            if shared:
+                print("🤝 Geração idêntica já em andamento - reaproveitando o resultado")
+            return js_code
                 
         except Exception as e:
             print(f"🔥 Erro ao gerar estratégia: {e}")
             print("🔄 Usando estratégia padrão como fallback")
             return self._get_default_strategy()
     
+    def _generate_uncached(self, prompt: str, cache_key: str) -> str:
+        """Gera a estratégia com o modelo; executada por uma única chamada por chave"""
+        # Outro processo pode ter gravado a estratégia enquanto esperávamos o lock
+        cached = self._cached_strategy(cache_key)
+        if cached:
+            return cached
+        
+        if Config.STRATEGY_CANDIDATES > 1:
+            return self._run_tournament(prompt, Config.STRATEGY_CANDIDATES, cache_key)
+        
+        js_code = self._request_strategy(prompt)
+        
+        if js_code:
+            print("✨ Estratégia gerada com sucesso!")
+            print(f"📝 Código gerado:\n{js_code}")
+            if self.cache:
+                result = self._score_candidate(js_code)
+                if result:
+                    self.cache.put(cache_key, js_code, result[0], Config.MODEL_NAME)
+            return js_code
+        else:
+            print("❌ Não foi possível extrair código JavaScript da resposta")
+            return self._get_default_strategy()
+    
+    def _cached_strategy(self, cache_key: str) -> Optional[str]:
+        """Retorna o código em cache para a chave, se houver"""
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached:
+            print(f"⚡ Estratégia encontrada no cache ({cached['score']:.1f} pontos simulados)")
+            return cached['code']
+        return None
+    
+    def _request_strategy(self, prompt: str) -> Optional[str]:
+        """Faz uma chamada ao modelo e extrai o código JavaScript da resposta"""
+        generation_config = {"temperature": Config.GENERATION_TEMPERATURE}
+        if Config.STREAM_GENERATION:
+            response = self.model.generate_content(prompt, generation_config=generation_config, stream=True)
+            return self._consume_stream(response)
+        
+        response = self.model.generate_content(prompt, generation_config=generation_config)
+        return self._extract_js_code(response.text)
+    
+    def _consume_stream(self, response) -> Optional[str]:
+        """
+        Lê a resposta em streaming e para assim que o resultado estiver decidido.
+        
+        O stream é encerrado quando o primeiro bloco de código fecha, ou abortado quando
+        nenhuma direção aparece nos primeiros Config.STREAM_ABORT_BYTES bytes.
+        
+        Returns:
+            str: Código JavaScript extraído, ou None se a resposta foi abortada ou é inválida
+        """
+        text = ""
+        size = 0  # Bytes UTF-8 recebidos
+        chunks = iter(response)
+        try:
+            for chunk in chunks:
+                piece = self._chunk_text(chunk)
+                text += piece
+                size += len(piece.encode('utf-8'))
+                
+                block = FENCED_BLOCK.search(text)
+                if block:
+                    print(f"✂️ Bloco de código completo após {size} bytes - encerrando stream")
+                    return self._extract_js_code(block.group(1))
+                
+                if size >= Config.STREAM_ABORT_BYTES and not any(token in text for token in DIRECTION_TOKENS):
+                    print(f"🛑 Nenhuma direção nos primeiros {size} bytes - abortando stream")
+                    return None
+        finally:
+            self._cancel_stream(response, chunks)
+        
+        return self._extract_js_code(text)
+    
+    @staticmethod
+    def _cancel_stream(response, chunks):
+        """
+        Encerra o stream de geração, interrompendo o modelo se a leitura parou antes do fim.
+        
+        GenerateContentResponse não tem close/cancel: o iterador do transporte fica em
+        `_iterator` (a chamada gRPC, com cancel(); no transporte REST, um gerador com close()).
+        O iterador local `chunks` também é fechado.
+        """
+        transport = getattr(response, '_iterator', None)
+        for source in (transport, response):
+            stop = getattr(source, 'cancel', None) or getattr(source, 'close', None)
+            if callable(stop):
+                stop()
+                break
+        close = getattr(chunks, 'close', None)
+        if chunks is not response and callable(close):
+            close()
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Texto de um trecho do stream ('' para trechos sem partes, como os só de metadados)"""
+        try:
+            return getattr(chunk, 'text', '') or ''
+        except ValueError:
+            # O acessor .text levanta ValueError quando o trecho não tem partes de texto
+            return ''
+    
+    def _cache_key(self, prompt: str) -> str:
+        """Chave do cache: prompt, modelo e parâmetros que afetam a geração"""
+        params = {
+            "temperature": Config.GENERATION_TEMPERATURE,
+            "candidates": Config.STRATEGY_CANDIDATES
+        }
+        if make_cache_key:
+            return make_cache_key(prompt, Config.MODEL_NAME, params)
+        # Também nomeia os arquivos de lock do single-flight, então precisa ser um hash
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    
+    def _evaluate_candidate(self, prompt: str) -> Optional[Tuple[float, str]]:
+        """Gera, valida e pontua uma candidata no simulador; None se ela for descartada"""
+        try:
+            js_code = self._request_strategy(prompt)
+        except Exception as e:
+            print(f"🔥 Erro ao gerar candidata: {e}")
+            return None
+        
+        return self._score_candidate(js_code) if js_code else None
+    
+    def _score_candidate(self, js_code: str) -> Optional[Tuple[float, str]]:
+        """Valida e pontua uma estratégia no simulador; None se ela for descartada"""
+        if not self.validate_strategy(js_code):
+            return None
+        score = score_strategy(js_code) if score_strategy else 0.0
+        if score is None:
+            return None
+        return score, js_code
+    
+    def _run_tournament(self, prompt: str, candidates: int, cache_key: str = "") -> str:
+        """
+        Gera `candidates` estratégias em paralelo e retorna a de maior pontuação simulada.
+        
+        A estratégia padrão entra como referência; uma candidata só vence se empatar ou superar.
+        
+        Args:
+            prompt: Prompt detalhado para geração da estratégia
+            candidates: Número de chamadas ao modelo
+            cache_key: Chave onde gravar a vencedora, se ela for uma estratégia gerada
+            
+        Returns:
+            str: Código JavaScript da melhor estratégia
+        """
+        workers = min(candidates, Config.GENERATION_CONCURRENCY)
+        print(f"🏁 Gerando {candidates} estratégias candidatas ({workers} chamadas em paralelo)...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._evaluate_candidate, [prompt] * candidates))
+        
+        ranked = [result for result in results if result is not None]
+        print(f"📊 {len(ranked)}/{candidates} candidatas válidas: "
+              f"{', '.join(f'{score:.1f}' for score, _ in ranked) or 'nenhuma'}")
+        
+        default_code = self._get_default_strategy()
+        default_score = (score_strategy(default_code) if score_strategy else None) or 0.0
+        ranked.append((default_score, default_code))
+        
+        # max() mantém a primeira de maior pontuação: empates favorecem as candidatas geradas
+        best_score, best_code = max(ranked, key=lambda result: result[0])
+        if best_code is default_code:
+            print(f"🔄 Nenhuma candidata superou a estratégia padrão ({default_score:.1f} pontos)")
+        else:
+            print(f"🏆 Melhor candidata: {best_score:.1f} pontos simulados (padrão: {default_score:.1f})")
+            print(f"📝 Código gerado:\n{best_code}")
+            if self.cache:
+                self.cache.put(cache_key, best_code, best_score, Config.MODEL_NAME)
+        return best_code
+    
     def _get_default_strategy(self) -> str:
         """Retorna uma estratégia padrão quando a IA não está disponível"""
         return """
@@ -110,8 +367,7 @@ class StrategyGenerator:
         text = text.strip()
         
         # Validação básica: deve conter pelo menos uma direção
-        directions = ['up', 'down', 'left', 'right']
-        if not any(direction in text for direction in directions):
+        if not any(direction in text for direction in DIRECTION_TOKENS):
             print("⚠️ Código gerado não parece conter direções válidas")
             return None
         
@@ -121,39 +377,46 @@ class StrategyGenerator:
         """
         Valida se a estratégia gerada é válida.
         
+        A estratégia é compilada em um worker Node.js persistente, exatamente como
+        no tabuleiro, e executada em um lote de posições de teste.
+        
         Args:
             js_code: Código JavaScript da estratégia
             
         Returns:
             bool: True se a estratégia é válida, False caso contrário
         """
-        try:
-            # Testa se o código pode ser compilado
-            test_function = f"""
-            function testStrategy(playerPos, rewardPos) {{
-                const {{ x: px, y: py }} = playerPos;
-                const {{ x: rx, y: ry }} = rewardPos;
-                {js_code}
-            }}
-            """
-            
-            # Tenta criar a função (validação de sintaxe)
-            exec(test_function)
-            
-            # Testa com valores de exemplo
-            test_function = f"""
-            function testStrategy(playerPos, rewardPos) {{
-                const {{ x: px, y: py }} = playerPos;
-                const {{ x: rx, y: ry }} = rewardPos;
-                {js_code}
-            }}
-            testStrategy({{x: 1, y: 1}}, {{x: 2, y: 2}});
-            """
-            
-            exec(test_function)
-            print("✅ Estratégia validada com sucesso!")
+        pool = get_worker_pool() if get_worker_pool else None
+        if pool is None:
+            print("⚠️ Node.js não disponível - validação de comportamento ignorada")
             return True
-            
-        except Exception as e:
-            print(f"❌ Estratégia inválida: {e}")
-            return False 
\ No newline at end of file
+        
+        positions = build_test_positions()
+        result = pool.submit('validate', code=js_code, positions=positions)
+        if result is None:
+            print("❌ Estratégia inválida: tempo limite excedido (possível loop infinito)")
+            return False
+        if not result['ok']:
+            print(f"❌ Estratégia inválida: {result['error']}")
+            return False
+        if result['exceptions']:
+            print(f"❌ Estratégia lançou {result['exceptions']} exceções: {result['last_error']}")
+            return False
+        if result['invalid']:
+            print(f"❌ Estratégia retornou {result['invalid']} direções inválidas")
+            return False
+        
+        idle = result['moves'].count(None)
+        if idle:
+            print(f"❌ Estratégia fica parada em {idle} posições fora da recompensa")
+            return False
+        
+        if result['progress'] < MIN_PROGRESS_RATIO * len(positions):
+            print(f"❌ Estratégia só aproxima da recompensa em {result['progress']}/{len(positions)} "
+                  f"posições de teste (mínimo {MIN_PROGRESS_RATIO:.0%})")
+            return False
+        
+        print(f"✅ Estratégia validada com sucesso! "
+              f"{result['progress']}/{len(positions)} movimentos aproximam da recompensa "
+              f"(compilação {result['compile_ms']:.2f} ms, execução {result['run_ms']:.2f} ms)")
+        return True
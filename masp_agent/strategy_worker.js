@@ -0,0 +1,144 @@
+/**
+ * Worker Node.js para compilar e testar estratégias do agente MASP
+ * Recebe uma requisição JSON por linha no stdin e responde uma linha JSON no stdout.
+ * As estratégias são compiladas exatamente como em GameManager.deployAIStrategy.
+ */
+
+const readline = require('readline');
+
+// Mesmas direções de game_manager.js; o código DIRECTION_NAMES.length significa "parado"
+const DIRECTIONS = { 
+    'up': [0, -1], 
+    'down': [0, 1], 
+    'left': [-1, 0], 
+    'right': [1, 0] 
+};
+const DIRECTION_NAMES = Object.keys(DIRECTIONS);
+const NOOP = DIRECTION_NAMES.length;
+
+/**
+ * Compila o corpo de uma estratégia
+ * @param {string} jsCode - Corpo da função da estratégia
+ * @returns {Function} Função (playerPos, rewardPos) => direção
+ */
+function compileStrategy(jsCode) {
+    return new Function('playerPos', 'rewardPos', `
+        const { x: px, y: py } = playerPos;
+        const { x: rx, y: ry } = rewardPos;
+        ${jsCode}
+    `);
+}
+
+/**
+ * Avalia a estratégia em todos os pares (jogador, recompensa) do interior do tabuleiro
+ * @param {Object} request - { code, cols, rows }
+ * @returns {Object} Tabela densa de códigos e contagem de exceções/retornos inválidos
+ */
+function compileTable(request) {
+    const strategy = compileStrategy(request.code);
+    const { cols, rows } = request;
+    const cells = cols * rows;
+    const codes = new Uint8Array(cells * cells).fill(NOOP);
+    let exceptions = 0, invalid = 0, lastError = null;
+
+    for (let py = 1; py < rows - 1; py++) {
+        for (let px = 1; px < cols - 1; px++) {
+            const base = (py * cols + px) * cells;
+            for (let ry = 1; ry < rows - 1; ry++) {
+                for (let rx = 1; rx < cols - 1; rx++) {
+                    let move;
+                    try {
+                        move = strategy({ x: px, y: py }, { x: rx, y: ry });
+                    } catch (error) {
+                        exceptions++;
+                        lastError = String(error);
+                        continue;
+                    }
+                    const code = DIRECTION_NAMES.indexOf(move);
+                    if (code >= 0) {
+                        codes[base + ry * cols + rx] = code;
+                    } else if (move) {
+                        invalid++;
+                    }
+                }
+            }
+        }
+    }
+
+    let table = '';
+    for (let i = 0; i < codes.length; i += 8192) {
+        table += String.fromCharCode(...codes.subarray(i, i + 8192).map(c => c + 48));
+    }
+    return { table, exceptions, invalid, last_error: lastError };
+}
+
+/**
+ * Executa a estratégia em um lote de posições de teste
+ * @param {Object} request - { code, positions: [[px, py, rx, ry], ...] }
+ * @returns {Object} Movimentos retornados, exceções, retornos inválidos e quantos movimentos aproximam da recompensa
+ */
+function validateStrategy(request) {
+    const compileStart = process.hrtime.bigint();
+    const strategy = compileStrategy(request.code);
+    const runStart = process.hrtime.bigint();
+    const moves = [];
+    let exceptions = 0, invalid = 0, progress = 0, lastError = null;
+
+    for (const [px, py, rx, ry] of request.positions) {
+        let move;
+        try {
+            move = strategy({ x: px, y: py }, { x: rx, y: ry });
+        } catch (error) {
+            exceptions++;
+            lastError = String(error);
+            moves.push(null);
+            continue;
+        }
+        const delta = DIRECTION_NAMES.includes(move) ? DIRECTIONS[move] : null;
+        if (!delta) {
+            if (move) invalid++;
+            moves.push(null);
+            continue;
+        }
+        moves.push(move);
+        const before = Math.abs(px - rx) + Math.abs(py - ry);
+        const after = Math.abs(px + delta[0] - rx) + Math.abs(py + delta[1] - ry);
+        if (after < before) progress++;
+    }
+
+    const end = process.hrtime.bigint();
+    return {
+        moves,
+        exceptions,
+        invalid,
+        progress,
+        last_error: lastError,
+        compile_ms: Number(runStart - compileStart) / 1e6,
+        run_ms: Number(end - runStart) / 1e6
+    };
+}
+
+const handlers = {
+    compile: compileTable,
+    validate: validateStrategy
+};
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+rl.on('line', (line) => {
+    let request = {};
+    let response;
+    const start = process.hrtime.bigint();
+    try {
+        request = JSON.parse(line);
+        const handler = handlers[request.op];
+        if (!handler) {
+            throw new Error(`Operação desconhecida: ${request.op}`);
+        }
+        response = { ok: true, ...handler(request) };
+    } catch (error) {
+        response = { ok: false, error: String(error) };
+    }
+    response.id = request.id;
+    response.elapsed_ms = Number(process.hrtime.bigint() - start) / 1e6;
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
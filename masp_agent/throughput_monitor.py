@@ -0,0 +1,82 @@
+"""
+Monitor de vazão do agente residente.
+Acompanha a pontuação do jogador da IA a cada update_state e mede pontos por
+tick em uma janela deslizante, sinalizando quando a vazão cai em relação à
+referência medida logo após a implantação da estratégia.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        THROUGHPUT_WINDOW_TICKS = 600
+        REGRESSION_THRESHOLD = 0.3
+
+
+class ThroughputMonitor:
+    """Pontos por tick do jogador da IA em uma janela deslizante de ticks do tabuleiro"""
+
+    def __init__(self, window_ticks: Optional[int] = None, threshold: Optional[float] = None):
+        self.window_ticks = window_ticks if window_ticks is not None else Config.THROUGHPUT_WINDOW_TICKS
+        self.threshold = threshold if threshold is not None else Config.REGRESSION_THRESHOLD
+        self.samples: Deque[Tuple[int, int]] = deque()  # (tick, pontuação)
+        self.baseline: Optional[float] = None
+        self.regressions = 0
+
+    def reset(self):
+        """Descarta as amostras e a referência (ex.: após trocar de estratégia)"""
+        self.samples.clear()
+        self.baseline = None
+
+    def record(self, tick: int, score: int) -> bool:
+        """
+        Registra a pontuação do jogador da IA em um tick do tabuleiro.
+
+        A primeira janela completa vira a referência; as seguintes são comparadas com ela.
+
+        Returns:
+            bool: True se a vazão da janela atual caiu abaixo da referência
+        """
+        if self.samples:
+            last_tick, last_score = self.samples[-1]
+            if tick == last_tick:
+                # update_state extra no mesmo tick (movimentos, implantações)
+                return False
+            if tick < last_tick or score < last_score:
+                # Tabuleiro reiniciado ou jogador recriado: recomeça a medição
+                self.reset()
+
+        self.samples.append((tick, score))
+        # Mantém a amostra mais antiga que ainda cobre a janela inteira
+        while len(self.samples) > 1 and tick - self.samples[1][0] >= self.window_ticks:
+            self.samples.popleft()
+
+        rate = self.points_per_tick()
+        if rate is None:
+            return False
+        if self.baseline is None:
+            self.baseline = rate
+            return False
+        if rate < self.baseline * (1 - self.threshold):
+            self.regressions += 1
+            return True
+        return False
+
+    def points_per_tick(self) -> Optional[float]:
+        """Vazão da janela atual, ou None enquanto a janela não estiver completa"""
+        first_tick, first_score = self.samples[0] if self.samples else (0, 0)
+        last_tick, last_score = self.samples[-1] if self.samples else (0, 0)
+        if last_tick - first_tick < self.window_ticks:
+            return None
+        return (last_score - first_score) / (last_tick - first_tick)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna a vazão atual, a referência e quantas regressões foram detectadas"""
+        return {
+            'pontos_por_tick': self.points_per_tick(),
+            'referencia': self.baseline,
+            'regressoes': self.regressions
+        }
@@ -0,0 +1,483 @@
+"""
+Motor do jogo Block Picker usado pelo Oráculo MCP.
+Espelha as regras aplicadas por `realtime_game/game_manager.js`: tabuleiro
+cercado por paredes, movimentos em `DIRECTIONS` e recompensa que reaparece
+em uma posição aleatória do interior sempre que é coletada. Além disso, o
+tabuleiro pode ser maior que o do jogo e ter obstáculos no interior.
+"""
+
+import random
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Constantes do Jogo (as mesmas de game_manager.js)
+WIDTH, HEIGHT, BLOCK_SIZE = 400, 400, 40
+DIRECTIONS = {
+    'up': (0, -1),
+    'down': (0, 1),
+    'left': (-1, 0),
+    'right': (1, 0)
+}
+
+# Lado dos tiles em que o mapa é dividido para envio (em células)
+TILE_SIZE = 32
+# Alterações de obstáculos lembradas pelo tabuleiro, para quem sincroniza por versão
+CHANGE_LOG_SIZE = 64
+# Maior lado suportado (as posições das sessões são guardadas em int16)
+MAX_BOARD_SIDE = 32767
+
+# Códigos das células da grade
+FREE = 0
+WALL = 1
+
+# Símbolos usados no desenho do mapa
+MAP_SYMBOLS = {FREE: 'O', WALL: '#'}
+
+
+def next_random(state: int) -> int:
+    """
+    Avança o gerador xorshift32 usado pelo motor.
+
+    O estado cabe em um único inteiro, o que torna cópias do jogo baratas.
+
+    Args:
+        state: Estado atual do gerador (diferente de zero)
+
+    Returns:
+        int: Próximo estado do gerador
+    """
+    state ^= (state << 13) & 0xFFFFFFFF
+    state ^= state >> 17
+    state ^= (state << 5) & 0xFFFFFFFF
+    return state
+
+
+def new_seed(seed: Optional[int] = None) -> int:
+    """Converte uma semente opcional em um estado válido para o xorshift32"""
+    if seed is None:
+        seed = random.getrandbits(32)
+    return (seed & 0xFFFFFFFF) or 0x9E3779B9
+
+
+class GameState(NamedTuple):
+    """Estado imutável de uma partida"""
+    px: int
+    py: int
+    bx: int
+    by: int
+    score: int
+    rng: int
+
+
+class Board:
+    """
+    Tabuleiro armazenado em uma grade compacta (bytearray, uma célula por byte).
+
+    Além da borda de paredes, o interior pode ter obstáculos. As células livres
+    ficam também em uma lista (com o índice de cada uma nela), para sortear a
+    recompensa em tempo constante em mapas grandes. A grade é dividida em tiles
+    de TILE_SIZE x TILE_SIZE células, cada um com a versão do mapa em que mudou
+    pela última vez.
+    """
+
+    __slots__ = ('cols', 'rows', 'cells', 'free', 'free_pos', 'version',
+                 'tiles_x', 'tiles_y', 'tile_versions', 'changes')
+
+    def __init__(self, cols: int = WIDTH // BLOCK_SIZE, rows: int = HEIGHT // BLOCK_SIZE,
+                 walls: Iterable[Tuple[int, int]] = ()):
+        """
+        Args:
+            cols, rows: Dimensões em células, incluindo a borda de paredes
+            walls: Obstáculos do interior, como posições (x, y)
+        """
+        if cols < 3 or rows < 3:
+            raise ValueError("O tabuleiro precisa de pelo menos 3x3 células")
+        if cols > MAX_BOARD_SIDE or rows > MAX_BOARD_SIDE:
+            raise ValueError(f"O tabuleiro tem no máximo {MAX_BOARD_SIDE} células por lado")
+        self.cols = cols
+        self.rows = rows
+        self.cells = bytearray(cols * rows)
+        for x in range(cols):
+            self.cells[x] = WALL
+            self.cells[(rows - 1) * cols + x] = WALL
+        for y in range(rows):
+            self.cells[y * cols] = WALL
+            self.cells[y * cols + cols - 1] = WALL
+        for x, y in walls:
+            self._check_interior(x, y)
+            self.cells[y * cols + x] = WALL
+
+        self.version = 0
+        self.tiles_x = -(-cols // TILE_SIZE)
+        self.tiles_y = -(-rows // TILE_SIZE)
+        self.tile_versions = array('I', bytes(4 * self.tiles_x * self.tiles_y))
+        # (versão, código gravado, índices alterados) das últimas CHANGE_LOG_SIZE alterações
+        self.changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self._index_free()
+
+    @classmethod
+    def generate(cls, cols: int, rows: int, obstacles: float, seed: Optional[int] = None) -> 'Board':
+        """
+        Cria um tabuleiro com obstáculos aleatórios.
+
+        Cada célula do interior vira obstáculo com probabilidade `obstacles`; depois,
+        as células livres que não se ligam ao centro (posição inicial) também viram
+        obstáculo, para que toda recompensa sorteada seja alcançável.
+
+        Args:
+            cols, rows: Dimensões em células
+            obstacles: Fração de obstáculos, entre 0 e 1
+            seed: Semente do sorteio (a mesma semente gera o mesmo mapa)
+        """
+        if not 0 <= obstacles < 1:
+            raise ValueError("A fração de obstáculos deve estar entre 0 e 1")
+        board = cls(cols, rows)
+        if obstacles == 0:
+            return board
+
+        rnd = random.Random(seed)
+        cells = board.cells
+        center = board.center()
+        for y in range(1, rows - 1):
+            row = y * cols
+            for x in range(1, cols - 1):
+                if rnd.random() < obstacles:
+                    cells[row + x] = WALL
+        start = center[1] * cols + center[0]
+        cells[start] = FREE
+
+        # Busca em largura a partir do centro; o que não foi alcançado vira parede
+        reached = bytearray(len(cells))
+        reached[start] = 1
+        stack = [start]
+        steps = (-cols, cols, -1, 1)
+        while stack:
+            index = stack.pop()
+            for step in steps:
+                neighbor = index + step
+                if not reached[neighbor] and cells[neighbor] == FREE:
+                    reached[neighbor] = 1
+                    stack.append(neighbor)
+        for index, cell in enumerate(cells):
+            if cell == FREE and not reached[index]:
+                cells[index] = WALL
+        board._index_free()
+        return board
+
+    def _index_free(self):
+        """Reconstrói a lista de células livres (em ordem de linha) e o índice de cada uma nela"""
+        self.free = array('i', (index for index, cell in enumerate(self.cells) if cell == FREE))
+        self.free_pos = array('i', [-1]) * len(self.cells)
+        for position, index in enumerate(self.free):
+            self.free_pos[index] = position
+        if len(self.free) < 2:
+            raise ValueError("O tabuleiro precisa de pelo menos 2 células livres")
+
+    def _check_interior(self, x: int, y: int):
+        if not (0 < x < self.cols - 1 and 0 < y < self.rows - 1):
+            raise ValueError(f"Posição fora do interior do tabuleiro: ({x}, {y})")
+        if (x, y) == self.center():
+            raise ValueError(f"A posição inicial ({x}, {y}) não pode ser obstáculo")
+
+    def center(self) -> Tuple[int, int]:
+        """Retorna a posição central do tabuleiro (mesma de centerPos)"""
+        return self.cols // 2, self.rows // 2
+
+    def is_free(self, x: int, y: int) -> bool:
+        """Verifica se a célula existe e não é parede"""
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.cells[y * self.cols + x] == FREE
+
+    def set_cells(self, positions: Sequence[Tuple[int, int]], cell: int) -> int:
+        """
+        Coloca ou remove obstáculos no interior.
+
+        Todas as posições são validadas antes de qualquer mudança. A versão do mapa
+        avança uma vez, e os tiles alterados passam a ter essa versão.
+
+        Args:
+            positions: Posições (x, y) do interior, fora da posição inicial
+            cell: WALL para colocar obstáculos, FREE para removê-los
+
+        Returns:
+            int: Quantas células mudaram
+
+        Raises:
+            ValueError: Posição inválida, ou o tabuleiro ficaria com menos de 2 células livres
+        """
+        if cell not in MAP_SYMBOLS:
+            raise ValueError(f"Célula inválida: {cell}")
+        cols = self.cols
+        changed = set()
+        for x, y in positions:
+            self._check_interior(x, y)
+            if self.cells[y * cols + x] != cell:
+                changed.add(y * cols + x)
+        if not changed:
+            return 0
+        if cell == WALL and len(self.free) - len(changed) < 2:
+            raise ValueError("O tabuleiro precisa de pelo menos 2 células livres")
+
+        self.version += 1
+        free, free_pos = self.free, self.free_pos
+        for index in changed:
+            self.cells[index] = cell
+            if cell == FREE:
+                free_pos[index] = len(free)
+                free.append(index)
+            else:
+                # Troca com a última célula livre e remove em tempo constante
+                position, last = free_pos[index], free[-1]
+                free[position] = last
+                free_pos[last] = position
+                free.pop()
+                free_pos[index] = -1
+            y, x = divmod(index, cols)
+            self.tile_versions[(y // TILE_SIZE) * self.tiles_x + x // TILE_SIZE] = self.version
+        self.changes.append((self.version, cell, tuple(changed)))
+        return len(changed)
+
+    def move(self, x: int, y: int, direction: str) -> Optional[Tuple[int, int]]:
+        """
+        Calcula o destino de um movimento a partir de (x, y).
+
+        Args:
+            x, y: Posição atual (sempre no interior do tabuleiro)
+            direction: Uma das chaves de DIRECTIONS
+
+        Returns:
+            Tuple[int, int]: Nova posição (igual à atual se houver parede),
+            ou None se a direção for inválida
+        """
+        try:
+            delta = DIRECTIONS.get(direction)
+        except TypeError:
+            # Direção não hashable (ex.: lista vinda de um JSON), também inválida
+            return None
+        if delta is None:
+            return None
+        nx, ny = x + delta[0], y + delta[1]
+        if self.cells[ny * self.cols + nx] == FREE:
+            return nx, ny
+        return x, y
+
+    def random_cell(self, rng: int, exclude: Tuple[int, int]) -> Tuple[int, int, int]:
+        """
+        Sorteia uma célula livre diferente de `exclude` em tempo constante.
+
+        Sem obstáculos equivale a randomBlock(): uniforme sobre o interior, sem cair no jogador.
+
+        Args:
+            rng: Estado atual do gerador
+            exclude: Posição que não pode ser sorteada (o jogador)
+
+        Returns:
+            Tuple[int, int, int]: (x, y, novo estado do gerador)
+        """
+        rng = next_random(rng)
+        excluded = self.free_pos[exclude[1] * self.cols + exclude[0]]
+        if excluded < 0:
+            # O jogador está sobre um obstáculo colocado depois que ele chegou ali
+            index = self.free[rng % len(self.free)]
+        else:
+            k = rng % (len(self.free) - 1)
+            index = self.free[k + (k >= excluded)]
+        y, x = divmod(index, self.cols)
+        return x, y, rng
+
+    def tile_bounds(self, tx: int, ty: int) -> Tuple[int, int, int, int]:
+        """Retângulo (x0, y0, x1, y1) do tile, com x1 e y1 exclusivos e recortados na borda"""
+        x0, y0 = tx * TILE_SIZE, ty * TILE_SIZE
+        return x0, y0, min(x0 + TILE_SIZE, self.cols), min(y0 + TILE_SIZE, self.rows)
+
+    def tile_version(self, tx: int, ty: int) -> int:
+        """Versão do mapa em que o tile mudou pela última vez (0 se nunca mudou)"""
+        return self.tile_versions[ty * self.tiles_x + tx]
+
+    def render(self, player: Optional[Tuple[int, int]], reward: Optional[Tuple[int, int]],
+               window: Optional[Tuple[int, int, int, int]] = None) -> str:
+        """
+        Desenha o tabuleiro com o jogador ('P') e a recompensa ('R').
+
+        Args:
+            player, reward: Posições a marcar (None desenha só paredes e células livres)
+            window: Retângulo (x0, y0, x1, y1) a desenhar, com x1 e y1 exclusivos (padrão: tudo)
+        """
+        x0, y0, x1, y1 = window if window is not None else (0, 0, self.cols, self.rows)
+        lines = []
+        for y in range(y0, y1):
+            row = [MAP_SYMBOLS[cell] for cell in self.cells[y * self.cols + x0:y * self.cols + x1]]
+            for position, symbol in ((reward, 'R'), (player, 'P')):
+                if position is not None and y == position[1] and x0 <= position[0] < x1:
+                    row[position[0] - x0] = symbol
+            lines.append("".join(row))
+        return "\n".join(lines)
+
+
+def initial_state(board: Board, seed: Optional[int] = None) -> GameState:
+    """Cria o estado inicial: jogador no centro e recompensa sorteada"""
+    px, py = board.center()
+    bx, by, rng = board.random_cell(new_seed(seed), (px, py))
+    return GameState(px, py, bx, by, 0, rng)
+
+
+def apply_move(board: Board, state: GameState, direction: str) -> Optional[Tuple[GameState, bool]]:
+    """
+    Aplica um movimento e a checagem de colisão de update().
+
+    Args:
+        board: Tabuleiro da partida
+        state: Estado atual
+        direction: Direção do movimento
+
+    Returns:
+        Tuple[GameState, bool]: (novo estado, se o jogador saiu do lugar),
+        ou None se a direção for inválida
+    """
+    target = board.move(state.px, state.py, direction)
+    if target is None:
+        return None
+    px, py = target
+    moved = px != state.px or py != state.py
+    if px == state.bx and py == state.by:
+        bx, by, rng = board.random_cell(state.rng, target)
+        return GameState(px, py, bx, by, state.score + 1, rng), moved
+    return GameState(px, py, state.bx, state.by, state.score, state.rng), moved
+
+
+def greedy_direction(board: Board, state: GameState) -> Optional[str]:
+    """Política padrão do agente: alinha na horizontal e depois na vertical"""
+    if state.bx < state.px:
+        return 'left'
+    if state.bx > state.px:
+        return 'right'
+    if state.by < state.py:
+        return 'up'
+    if state.by > state.py:
+        return 'down'
+    return None
+
+
+def shortest_path_direction(board: Board, state: GameState) -> Optional[str]:
+    """Política que segue um caminho mínimo até a recompensa, contornando obstáculos"""
+    # Importado na primeira chamada: pathfinding depende deste módulo
+    from pathfinding import best_direction
+    return best_direction(board, state)[0]
+
+
+# Políticas disponíveis para rollouts no servidor
+POLICIES: Dict[str, Callable[[Board, GameState], Optional[str]]] = {
+    'gulosa': greedy_direction,
+    'caminho': shortest_path_direction
+}
+
+
+class SimpleGameEngine:
+    """
+    Motor de uma partida do Block Picker com estado real.
+
+    O estado é um GameState imutável e o Board é compartilhado entre cópias,
+    então snapshot/restore/fork custam apenas uma referência.
+    """
+
+    __slots__ = ('board', 'state')
+
+    directions = list(DIRECTIONS)
+
+    def __init__(self, board: Optional[Board] = None, seed: Optional[int] = None):
+        self.board = board if board is not None else Board()
+        self.state = initial_state(self.board, seed)
+
+    def snapshot(self) -> GameState:
+        """Retorna um snapshot do estado atual (imutável, sem cópia)"""
+        return self.state
+
+    def restore(self, snapshot: GameState):
+        """Volta ao estado de um snapshot"""
+        self.state = snapshot
+
+    def fork(self) -> 'SimpleGameEngine':
+        """Cria um motor independente a partir do estado atual, compartilhando o tabuleiro"""
+        clone = SimpleGameEngine.__new__(SimpleGameEngine)
+        clone.board = self.board
+        clone.state = self.state
+        return clone
+
+    def set_move(self, direction: str) -> bool:
+        """
+        Move o jogador, coletando a recompensa se chegar nela.
+
+        Returns:
+            bool: True se o jogador se moveu (mesmo retorno de movePlayer)
+        """
+        result = apply_move(self.board, self.state, direction)
+        if result is None:
+            return False
+        self.state, moved = result
+        return moved
+
+    def step(self, direction: str) -> Optional[int]:
+        """
+        Aplica um movimento e retorna o ganho de pontuação.
+
+        Returns:
+            int: 1 se a recompensa foi coletada, 0 caso contrário, ou None se a direção for inválida
+        """
+        state = self.state
+        result = apply_move(self.board, state, direction)
+        if result is None:
+            return None
+        self.state = result[0]
+        return result[0].score - state.score
+
+    def rollout(self, moves: Optional[Sequence[str]] = None, steps: int = 0,
+                policy: Callable[[Board, GameState], Optional[str]] = greedy_direction) -> int:
+        """
+        Executa vários movimentos lendo e gravando o estado uma única vez.
+
+        Args:
+            moves: Lista de direções a aplicar; se None, usa `policy` por `steps` passos
+            steps: Número de passos quando `moves` não é informado
+            policy: Função (board, estado) -> direção usada sem `moves`
+
+        Returns:
+            int: Quantos movimentos foram aplicados (para na primeira direção inválida)
+        """
+        board = self.board
+        state = self.state
+        applied = 0
+        if moves is None:
+            for _ in range(steps):
+                direction = policy(board, state)
+                result = apply_move(board, state, direction) if direction is not None else None
+                if result is None:
+                    break
+                state = result[0]
+                applied += 1
+        else:
+            for direction in moves:
+                result = apply_move(board, state, direction)
+                if result is None:
+                    break
+                state = result[0]
+                applied += 1
+        self.state = state
+        return applied
+
+    def get_score(self) -> int:
+        return self.state.score
+
+    def get_map(self, window: Optional[Tuple[int, int, int, int]] = None, positions: bool = True) -> str:
+        if not positions:
+            return self.board.render(None, None, window)
+        state = self.state
+        return self.board.render((state.px, state.py), (state.bx, state.by), window)
+
+    def get_player_position(self) -> List[int]:
+        return [self.state.px, self.state.py]
+
+    def get_block_position(self) -> List[int]:
+        return [self.state.bx, self.state.by]
+
+    def get_valid_directions(self) -> List[str]:
+        return self.directions
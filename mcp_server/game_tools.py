@@ -0,0 +1,399 @@
+"""
+Ferramentas do Oráculo MCP.
+Cada ferramenta recebe o motor de uma sessão e seus argumentos e retorna
+(payload, status HTTP); as rotas Flask e o endpoint /batch usam a mesma tabela.
+As ferramentas de texto têm uma versão estruturada (`*_dados`) que devolve os
+campos crus, sem formatação, para clientes que pedem JSON/msgpack estruturado.
+"""
+
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import map_tiles
+import pathfinding
+from game_engine import POLICIES, TILE_SIZE, Board, GameState, SimpleGameEngine, apply_move
+
+ToolResult = Tuple[Dict[str, Any], int]
+
+# Limite de passos por rollout
+MAX_ROLLOUT_STEPS = 100_000
+# Janela padrão do mapa (centrada no jogador) e maior janela aceita, em células por lado
+VIEWPORT_SIZE = 64
+MAX_VIEWPORT = 256
+
+# Descrição das ferramentas expostas em /tools
+TOOLS: List[Dict[str, Any]] = [
+    {
+        "name": "mover",
+        "description": "Move o jogador na direção especificada",
+        "args": ["direcao"]
+    },
+    {
+        "name": "pontuacao",
+        "description": "Retorna a pontuação atual do jogador",
+        "args": []
+    },
+    {
+        "name": "mapa",
+        "description": "Retorna o desenho do mapa atual, ou de uma janela dele em mapas grandes "
+                       "(no formato estruturado, em tiles com versão; codificacao e desde só valem nele)",
+        "args": ["x", "y", "largura", "altura", "codificacao", "desde", "posicoes"]
+    },
+    {
+        "name": "posicao_jogador",
+        "description": "Retorna a posição atual do jogador",
+        "args": []
+    },
+    {
+        "name": "posicao_recompensa",
+        "description": "Retorna a posição atual da recompensa",
+        "args": []
+    },
+    {
+        "name": "direcoes_validas",
+        "description": "Retorna as direções válidas para movimento",
+        "args": []
+    },
+    {
+        "name": "melhor_direcao",
+        "description": "Retorna a direção do caminho mais curto até a recompensa, contornando obstáculos",
+        "args": []
+    },
+    {
+        "name": "regras_jogo",
+        "description": "Retorna as regras básicas do jogo",
+        "args": []
+    },
+    {
+        "name": "step",
+        "description": "Move o jogador e retorna posições, ganho de pontuação e se a recompensa foi coletada",
+        "args": ["direcao"]
+    },
+    {
+        "name": "rollout",
+        "description": "Executa uma lista de movimentos, ou n passos de uma política (gulosa ou caminho), "
+                       "no servidor",
+        "args": ["movimentos", "n", "politica"]
+    }
+]
+
+REGRAS_JOGO = """
+    📖 REGRAS DO JOGO BLOCK PICKER:
+
+    1. 🎯 OBJETIVO: Coletar o máximo de blocos vermelhos (R) possível
+    2. 🎮 MOVIMENTO: Use as direções up, down, left, right
+    3. 🚫 LIMITES: Não pode sair do tabuleiro (cercado por paredes #) nem atravessar obstáculos (#)
+    4. 🏆 PONTUAÇÃO: Cada bloco coletado adiciona 1 ponto
+    5. 👤 POSIÇÃO: O jogador é representado por 'P' no mapa
+    6. 🎯 RECOMPENSA: Os blocos vermelhos são representados por 'R'
+    7. ⬜ ESPAÇOS LIVRES: Representados por 'O'
+    8. 🧱 PAREDES: Representadas por '#'
+
+    O mapa usa coordenadas onde (0,0) é o canto superior esquerdo.
+    """
+
+
+def mover(engine: SimpleGameEngine, direcao: str) -> ToolResult:
+    """Move o jogador na direção especificada"""
+    if direcao not in engine.directions:
+        valid_dirs = ", ".join(engine.get_valid_directions())
+        return {"error": f"❌ Direção inválida. Use: {valid_dirs}"}, 400
+
+    score_before = engine.get_score()
+    if not engine.set_move(direcao):
+        return {"message": f"🧱 Movimento bloqueado pela parede: {direcao}"}, 200
+    if engine.get_score() > score_before:
+        return {"message": f"🎮 Movendo para {direcao} - 🏆 Recompensa coletada!"}, 200
+    return {"message": f"🎮 Movendo para {direcao}"}, 200
+
+
+def pontuacao(engine: SimpleGameEngine) -> ToolResult:
+    """Retorna a pontuação atual do jogador"""
+    return {"pontuacao": f"🏆 Pontuação: {engine.get_score()}"}, 200
+
+
+def _viewport(board: Board, state: GameState, x: Optional[int], y: Optional[int],
+              largura: Optional[int], altura: Optional[int]) -> Tuple[int, int, int, int]:
+    """Janela (x0, y0, x1, y1) dentro do tabuleiro; sem x/y, centrada no jogador"""
+    width = min(board.cols, VIEWPORT_SIZE if largura is None else largura)
+    height = min(board.rows, VIEWPORT_SIZE if altura is None else altura)
+    x0 = state.px - width // 2 if x is None else x
+    y0 = state.py - height // 2 if y is None else y
+    x0 = max(0, min(x0, board.cols - width))
+    y0 = max(0, min(y0, board.rows - height))
+    return x0, y0, x0 + width, y0 + height
+
+
+def _viewport_error(**args) -> Optional[str]:
+    """Mensagem de erro se algum argumento da janela for inválido"""
+    for name, value in args.items():
+        if value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool):
+            return f"❌ '{name}' deve ser um inteiro"
+        if name in ('largura', 'altura') and not 1 <= value <= MAX_VIEWPORT:
+            return f"❌ '{name}' deve estar entre 1 e {MAX_VIEWPORT}"
+        if name == 'desde' and value < 0:
+            return "❌ 'desde' deve ser uma versão do mapa (inteiro >= 0)"
+    return None
+
+
+def mapa(engine: SimpleGameEngine, x: Optional[int] = None, y: Optional[int] = None,
+         largura: Optional[int] = None, altura: Optional[int] = None,
+         codificacao: str = map_tiles.RLE, desde: Optional[int] = None,
+         posicoes: bool = True) -> ToolResult:
+    """
+    Retorna o desenho do mapa atual (em mapas grandes, de uma janela em volta do jogador).
+
+    Com `posicoes=False` e a janela fixada por x/y, o desenho só tem paredes e células
+    livres e não muda com as jogadas (só com os obstáculos).
+
+    `codificacao` e `desde` só valem no formato estruturado (tiles); aqui são validados e
+    ignorados, para que as duas versões da ferramenta aceitem os mesmos argumentos.
+    """
+    error = _viewport_error(x=x, y=y, largura=largura, altura=altura, desde=desde)
+    if error:
+        return {"error": error}, 400
+    if codificacao not in map_tiles.ENCODINGS:
+        return {"error": f"❌ Codificação desconhecida. Use: {', '.join(map_tiles.ENCODINGS)}"}, 400
+
+    board = engine.board
+    window = _viewport(board, engine.state, x, y, largura, altura)
+    if window == (0, 0, board.cols, board.rows):
+        return {"mapa": f"🗺️ Mapa atual:\n{engine.get_map(positions=bool(posicoes))}"}, 200
+    x0, y0, x1, y1 = window
+    return {
+        "mapa": f"🗺️ Mapa atual (x {x0}-{x1 - 1}, y {y0}-{y1 - 1} de {board.cols}x{board.rows}):\n"
+                f"{engine.get_map(window, bool(posicoes))}"
+    }, 200
+
+
+def posicao_jogador(engine: SimpleGameEngine) -> ToolResult:
+    """Retorna a posição atual do jogador"""
+    pos = engine.get_player_position()
+    return {"posicao": f"👤 Posição do jogador: ({pos[0]}, {pos[1]})"}, 200
+
+
+def posicao_recompensa(engine: SimpleGameEngine) -> ToolResult:
+    """Retorna a posição atual da recompensa"""
+    pos = engine.get_block_position()
+    return {"posicao": f"🎯 Posição da recompensa: ({pos[0]}, {pos[1]})"}, 200
+
+
+def direcoes_validas(engine: SimpleGameEngine) -> ToolResult:
+    """Retorna as direções válidas para movimento"""
+    directions = engine.get_valid_directions()
+    return {"direcoes": f"🔄 Direções válidas: {', '.join(directions)}"}, 200
+
+
+def melhor_direcao(engine: SimpleGameEngine) -> ToolResult:
+    """Retorna a direção do caminho mais curto até a recompensa"""
+    direction, distance = pathfinding.best_direction(engine.board, engine.state)
+    if direction is None:
+        return {"direcao": "🚫 Nenhum caminho até a recompensa"}, 200
+    return {"direcao": f"🧭 Melhor direção: {direction} (recompensa a {distance} passos)"}, 200
+
+
+def regras_jogo(engine: SimpleGameEngine) -> ToolResult:
+    """Retorna as regras básicas do jogo"""
+    return {"regras": REGRAS_JOGO}, 200
+
+
+def mover_dados(engine: SimpleGameEngine, direcao: str) -> ToolResult:
+    """Move o jogador e retorna se moveu, se coletou e o estado resultante"""
+    state = engine.state
+    result = apply_move(engine.board, state, direcao)
+    if result is None:
+        valid_dirs = ", ".join(engine.get_valid_directions())
+        return {"error": f"❌ Direção inválida. Use: {valid_dirs}"}, 400
+
+    engine.state, moved = result
+    payload = _state_payload(engine)
+    payload["moveu"] = moved
+    payload["coletou"] = result[0].score > state.score
+    return payload, 200
+
+
+def pontuacao_dados(engine: SimpleGameEngine) -> ToolResult:
+    """Pontuação atual como inteiro"""
+    return {"pontuacao": engine.get_score()}, 200
+
+
+def mapa_dados(engine: SimpleGameEngine, x: Optional[int] = None, y: Optional[int] = None,
+               largura: Optional[int] = None, altura: Optional[int] = None,
+               codificacao: str = map_tiles.RLE, desde: Optional[int] = None,
+               posicoes: bool = True) -> ToolResult:
+    """
+    Tiles do mapa que cobrem a janela, com jogador e recompensa à parte (omitidos com `posicoes=False`).
+
+    Cada tile traz sua versão (a versão do mapa em que mudou pela última vez). Com
+    `desde`, só os tiles alterados depois dessa versão do mapa trazem `dados`: o
+    cliente guarda os tiles já recebidos e só substitui os que mudaram.
+    """
+    error = _viewport_error(x=x, y=y, largura=largura, altura=altura, desde=desde)
+    if error:
+        return {"error": error}, 400
+    if codificacao not in map_tiles.ENCODINGS:
+        return {"error": f"❌ Codificação desconhecida. Use: {', '.join(map_tiles.ENCODINGS)}"}, 400
+
+    board, state = engine.board, engine.state
+    x0, y0, x1, y1 = _viewport(board, state, x, y, largura, altura)
+    columns, rows = map_tiles.tile_range(board, x0, y0, x1, y1)
+    tiles = []
+    for ty in rows:
+        for tx in columns:
+            version = board.tile_version(tx, ty)
+            tile = {"tx": tx, "ty": ty, "versao": version}
+            if desde is None or version > desde:
+                tile["dados"] = map_tiles.encoded_tile(board, tx, ty, codificacao)
+            tiles.append(tile)
+    payload = {
+        "largura": board.cols,
+        "altura": board.rows,
+        "tamanho_tile": TILE_SIZE,
+        "versao": board.version,
+        "janela": [x0, y0, x1 - x0, y1 - y0],
+        "codificacao": codificacao,
+        "tiles": tiles
+    }
+    if posicoes:
+        payload["jogador"] = [state.px, state.py]
+        payload["recompensa"] = [state.bx, state.by]
+    return payload, 200
+
+
+def posicao_jogador_dados(engine: SimpleGameEngine) -> ToolResult:
+    """Posição do jogador como {x, y}"""
+    state = engine.state
+    return {"x": state.px, "y": state.py}, 200
+
+
+def posicao_recompensa_dados(engine: SimpleGameEngine) -> ToolResult:
+    """Posição da recompensa como {x, y}"""
+    state = engine.state
+    return {"x": state.bx, "y": state.by}, 200
+
+
+def direcoes_validas_dados(engine: SimpleGameEngine) -> ToolResult:
+    """Lista de direções válidas"""
+    return {"direcoes": list(engine.get_valid_directions())}, 200
+
+
+def melhor_direcao_dados(engine: SimpleGameEngine) -> ToolResult:
+    """Direção do caminho mais curto e distância em passos (ambas nulas se não houver caminho)"""
+    direction, distance = pathfinding.best_direction(engine.board, engine.state)
+    return {"direcao": direction, "distancia": distance}, 200
+
+
+def regras_jogo_dados(engine: SimpleGameEngine) -> ToolResult:
+    """Regras do jogo, sem a indentação do texto"""
+    return {"regras": inspect.cleandoc(REGRAS_JOGO)}, 200
+
+
+def _state_payload(engine: SimpleGameEngine) -> Dict[str, Any]:
+    state = engine.state
+    return {
+        "jogador": [state.px, state.py],
+        "recompensa": [state.bx, state.by],
+        "pontuacao": state.score
+    }
+
+
+def step(engine: SimpleGameEngine, direcao: str) -> ToolResult:
+    """Aplica uma direção e retorna o estado resultante em uma única resposta"""
+    delta = engine.step(direcao)
+    if delta is None:
+        valid_dirs = ", ".join(engine.get_valid_directions())
+        return {"error": f"❌ Direção inválida. Use: {valid_dirs}"}, 400
+
+    payload = _state_payload(engine)
+    payload["delta_pontuacao"] = delta
+    # A rodada termina quando a recompensa é coletada (e reaparece em outro lugar)
+    payload["done"] = delta > 0
+    return payload, 200
+
+
+def rollout(engine: SimpleGameEngine, movimentos: Optional[List[str]] = None,
+            n: int = 0, politica: str = "gulosa") -> ToolResult:
+    """Executa vários movimentos no servidor e retorna o estado final"""
+    if not isinstance(politica, str) or politica not in POLICIES:
+        return {"error": f"❌ Política desconhecida. Use: {', '.join(POLICIES)}"}, 400
+    if movimentos is not None:
+        if not isinstance(movimentos, list) or any(
+                not isinstance(d, str) or d not in engine.directions for d in movimentos):
+            valid_dirs = ", ".join(engine.get_valid_directions())
+            return {"error": f"❌ 'movimentos' deve ser uma lista com: {valid_dirs}"}, 400
+        if len(movimentos) > MAX_ROLLOUT_STEPS:
+            return {"error": f"❌ Máximo de {MAX_ROLLOUT_STEPS} passos por rollout"}, 400
+    elif type(n) is not int or not 0 <= n <= MAX_ROLLOUT_STEPS:
+        return {"error": f"❌ 'n' deve estar entre 0 e {MAX_ROLLOUT_STEPS}"}, 400
+
+    score_before = engine.get_score()
+    applied = engine.rollout(movimentos, steps=n, policy=POLICIES[politica])
+    payload = _state_payload(engine)
+    payload["passos"] = applied
+    payload["delta_pontuacao"] = payload["pontuacao"] - score_before
+    return payload, 200
+
+
+TOOL_HANDLERS: Dict[str, Callable[..., ToolResult]] = {
+    "mover": mover,
+    "pontuacao": pontuacao,
+    "mapa": mapa,
+    "posicao_jogador": posicao_jogador,
+    "posicao_recompensa": posicao_recompensa,
+    "direcoes_validas": direcoes_validas,
+    "melhor_direcao": melhor_direcao,
+    "regras_jogo": regras_jogo,
+    "step": step,
+    "rollout": rollout
+}
+
+# Mesmas ferramentas e argumentos, com payloads de campos crus (step e rollout já são estruturados)
+STRUCTURED_HANDLERS: Dict[str, Callable[..., ToolResult]] = {
+    "mover": mover_dados,
+    "pontuacao": pontuacao_dados,
+    "mapa": mapa_dados,
+    "posicao_jogador": posicao_jogador_dados,
+    "posicao_recompensa": posicao_recompensa_dados,
+    "direcoes_validas": direcoes_validas_dados,
+    "melhor_direcao": melhor_direcao_dados,
+    "regras_jogo": regras_jogo_dados,
+    "step": step,
+    "rollout": rollout
+}
+
+# As versões de texto e estruturada de uma ferramenta podem aceitar argumentos diferentes
+TOOL_SIGNATURES = {
+    handler: inspect.signature(handler)
+    for handler in (*TOOL_HANDLERS.values(), *STRUCTURED_HANDLERS.values())
+}
+
+
+def run_tool(engine: SimpleGameEngine, name: str, args: Any = None,
+             structured: bool = False) -> ToolResult:
+    """
+    Executa uma ferramenta pelo nome.
+
+    Args:
+        engine: Motor da sessão alvo
+        name: Nome da ferramenta (chave de TOOL_HANDLERS)
+        args: Argumentos como lista posicional ou dicionário nomeado
+        structured: Usa a versão estruturada da ferramenta (STRUCTURED_HANDLERS)
+
+    Returns:
+        ToolResult: (payload, status HTTP) da ferramenta
+    """
+    handlers = STRUCTURED_HANDLERS if structured else TOOL_HANDLERS
+    handler = handlers.get(name) if isinstance(name, str) else None
+    if handler is None:
+        return {"error": f"❌ Ferramenta desconhecida: {name}"}, 404
+
+    try:
+        if isinstance(args, dict):
+            bound = TOOL_SIGNATURES[handler].bind(engine, **args)
+        else:
+            bound = TOOL_SIGNATURES[handler].bind(engine, *(args or []))
+    except TypeError:
+        return {"error": f"❌ Argumentos inválidos para {name}"}, 400
+    return handler(*bound.args, **bound.kwargs)
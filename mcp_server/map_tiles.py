@@ -0,0 +1,89 @@
+"""
+Codificação do mapa em tiles para o envio de mapas grandes.
+O mapa é dividido em tiles de TILE_SIZE x TILE_SIZE células (recortados na
+borda) e cada tile é enviado só com paredes e células livres, em uma de duas
+codificações:
+
+- `rle`: comprimentos de sequências alternadas, começando por células livres
+  (a primeira pode ter comprimento 0), em ordem de linha dentro do tile;
+- `bits`: um bit por célula (1 = parede), em ordem de linha, completado com
+  zeros até o byte, em base64.
+
+Um tile codificado só muda quando sua versão muda, então a codificação é
+memorizada por (tabuleiro, tile, versão).
+"""
+
+import base64
+from functools import lru_cache
+from itertools import groupby
+from typing import List, Tuple, Union
+
+from game_engine import FREE, TILE_SIZE, WALL, Board
+
+RLE = 'rle'
+BITS = 'bits'
+ENCODINGS = (RLE, BITS)
+
+# Tiles codificados mantidos em memória (uma janela padrão usa até 9)
+TILE_CACHE_SIZE = 4096
+
+TileData = Union[List[int], str]
+
+_BITS_TABLE = bytes.maketrans(bytes([FREE, WALL]), b'01')
+
+
+def tile_cells(board: Board, tx: int, ty: int) -> bytes:
+    """Células do tile em ordem de linha"""
+    x0, y0, x1, y1 = board.tile_bounds(tx, ty)
+    cols = board.cols
+    return b''.join(board.cells[y * cols + x0:y * cols + x1] for y in range(y0, y1))
+
+
+def encode_rle(cells: bytes) -> List[int]:
+    """Comprimentos das sequências alternadas de células livres e paredes"""
+    runs = [] if cells[:1] == bytes([FREE]) else [0]
+    runs.extend(sum(1 for _ in group) for _, group in groupby(cells))
+    return runs
+
+
+def encode_bits(cells: bytes) -> str:
+    """Um bit por célula (1 = parede), em base64"""
+    size = (len(cells) + 7) // 8
+    bits = cells.translate(_BITS_TABLE).ljust(size * 8, b'0')
+    return base64.b64encode(int(bits, 2).to_bytes(size, 'big')).decode('ascii')
+
+
+def decode_tile(data: TileData, encoding: str, width: int, height: int) -> bytes:
+    """
+    Reconstrói as células de um tile (FREE/WALL em ordem de linha).
+
+    Args:
+        data: Dados do tile na codificação `encoding`
+        width, height: Dimensões do tile (menores que TILE_SIZE na borda do mapa)
+    """
+    count = width * height
+    if encoding == RLE:
+        cells = bytearray()
+        for position, run in enumerate(data):
+            cells.extend((WALL if position % 2 else FREE,) * run)
+        return bytes(cells)
+    packed = base64.b64decode(data)
+    bits = bin(int.from_bytes(packed, 'big'))[2:].zfill(len(packed) * 8)[:count]
+    return bytes(WALL if bit == '1' else FREE for bit in bits)
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def _encoded_tile(board: Board, tx: int, ty: int, version: int, encoding: str) -> TileData:
+    cells = tile_cells(board, tx, ty)
+    return encode_rle(cells) if encoding == RLE else encode_bits(cells)
+
+
+def encoded_tile(board: Board, tx: int, ty: int, encoding: str = RLE) -> TileData:
+    """Tile codificado, reaproveitado enquanto a versão do tile não mudar"""
+    return _encoded_tile(board, tx, ty, board.tile_version(tx, ty), encoding)
+
+
+def tile_range(board: Board, x0: int, y0: int, x1: int, y1: int) -> Tuple[range, range]:
+    """Tiles (colunas, linhas) que cobrem o retângulo de células [x0, x1) x [y0, y1)"""
+    return (range(x0 // TILE_SIZE, (x1 - 1) // TILE_SIZE + 1),
+            range(y0 // TILE_SIZE, (y1 - 1) // TILE_SIZE + 1))
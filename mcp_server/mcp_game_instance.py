@@ -3,165 +3,330 @@ Servidor MCP (Modelo) que expõe as regras do jogo para o agente MASP.
 Este é o "Oráculo" que o agente consulta para aprender como jogar.
 """
 
-from flask import Flask, jsonify
+import sys
+import threading
+from typing import Tuple
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import random
+
+import game_tools
+import map_tiles
+import response_formats
+from game_engine import FREE, WALL
+from response_formats import UnsupportedFormat
+from session_store import SessionNotFound, SessionStore
+from state_stream import StateBroadcaster
+from static_responses import StaticResponse
 
 # Configurações do servidor
 SERVER_NAME = "Block Picker Game Rules API"
 SERVER_DESCRIPTION = "API que expõe as regras e ferramentas do jogo Block Picker"
+MAX_BATCH_CALLS = 256
+MAX_OBSTACLE_CELLS = 4096
 
 # Inicializa o servidor Flask
 app = Flask(__name__)
 CORS(app)
 
-# Simulação do motor do jogo
-class SimpleGameEngine:
-    def __init__(self):
-        self.directions = ['up', 'down', 'left', 'right']
-        self.player_pos = [5, 5]
-        self.block_pos = [3, 3]
-        self.score = 0
-    
-    def set_move(self, direction):
-        if direction in self.directions:
-            return True
-        return False
-    
-    def get_score(self):
-        return self.score
-    
-    def get_map(self):
-        return """
-        ####################
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        #OOOOOOOOOOOOOOOOOO#
-        ####################
-        """
-    
-    def get_player_position(self):
-        return self.player_pos
-    
-    def get_block_position(self):
-        return self.block_pos
-    
-    def get_valid_directions(self):
-        return self.directions
+# Inicializa as sessões; a sessão padrão atende clientes que não informam `sessao`
+sessions = SessionStore()
+DEFAULT_SESSION = sessions.create()
+# Streams SSE do estado das sessões (/eventos)
+broadcaster = StateBroadcaster(sessions)
+
+# Rotas cujo conteúdo não depende do estado do jogo: serializadas e comprimidas uma única vez
+STATIC_TOOLS = StaticResponse(game_tools.TOOLS)
+STATIC_HEALTH = StaticResponse({"status": "healthy", "service": SERVER_NAME})
+
+
+def negotiated_static(name: str) -> dict:
+    """Respostas prontas de uma ferramenta sem estado em cada formato negociável"""
+    engine = sessions.engine(DEFAULT_SESSION)
+    responses = {}
+    for fmt in response_formats.available_formats():
+        handlers = game_tools.TOOL_HANDLERS if fmt == response_formats.TEXT else game_tools.STRUCTURED_HANDLERS
+        responses[fmt] = StaticResponse(handlers[name](engine)[0], fmt)
+    return responses
+
+
+STATIC_RULES = negotiated_static('regras_jogo')
+STATIC_DIRECTIONS = negotiated_static('direcoes_validas')
+
+
+def get_engine():
+    """Retorna o motor da sessão indicada em `?sessao=<id>` (ou da sessão padrão)"""
+    return sessions.engine(request.args.get('sessao', DEFAULT_SESSION))
+
+
+def response_format() -> str:
+    """Formato da resposta: ?formato=texto|json|msgpack ou o cabeçalho Accept (padrão: texto)"""
+    return response_formats.negotiate(request.args.get('formato'), request.headers.get('Accept', ''))
+
+
+def format_response(payload, status: int, fmt: str):
+    """Resposta no formato negociado: JSON com textos formatados ou o formato estruturado"""
+    if fmt == response_formats.TEXT:
+        response = jsonify(payload)
+        response.status_code = status
+        response.vary.add('Accept')
+        return response
+    return response_formats.respond(payload, status, fmt)
+
+
+def conditional(response):
+    """Adiciona ETag forte; responde 304 se o cliente enviar If-None-Match atual"""
+    if response.status_code == 200:
+        response.add_etag()
+        # O cliente pode guardar a resposta, mas precisa revalidá-la a cada uso
+        response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+    return response
+
+
+def tool_response(name: str, *args, **kwargs):
+    """Executa uma ferramenta na sessão da requisição, no formato negociado"""
+    fmt = response_format()
+    handlers = game_tools.TOOL_HANDLERS if fmt == response_formats.TEXT else game_tools.STRUCTURED_HANDLERS
+    payload, status = handlers[name](get_engine(), *args, **kwargs)
+    return format_response(payload, status, fmt)
+
+
+@app.errorhandler(SessionNotFound)
+def session_not_found(error):
+    return jsonify({"error": f"❌ Sessão não encontrada: {error.args[0]}"}), 404
+
+@app.errorhandler(UnsupportedFormat)
+def unsupported_format(error):
+    formats = ", ".join(response_formats.available_formats())
+    return jsonify({"error": f"❌ Formato não suportado: {error.args[0]}. Use: {formats}"}), 406
+
+
+# Rotas de sessões
+@app.route('/sessoes', methods=['POST'])
+def criar_sessao():
+    """Cria uma nova partida independente e retorna seu ID"""
+    data = request.get_json(silent=True)
+    if data is None and not request.get_data():
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "❌ Envie um JSON como {\"seed\": 42} (ou sem corpo)"}), 400
+    seed = data.get('seed')
+    if seed is not None and type(seed) is not int:
+        return jsonify({"error": "❌ 'seed' deve ser um inteiro"}), 400
+    session_id = sessions.create(seed=seed)
+    if session_id is None:
+        return jsonify({"error": f"❌ Limite de {sessions.max_sessions} sessões atingido"}), 503
+    return jsonify({"sessao": session_id}), 201
+
+@app.route('/sessoes/<session_id>', methods=['DELETE'])
+def encerrar_sessao(session_id):
+    """Encerra uma partida e libera seu espaço"""
+    if session_id == DEFAULT_SESSION:
+        return jsonify({"error": "❌ A sessão padrão não pode ser encerrada"}), 400
+    if not sessions.close(session_id):
+        raise SessionNotFound(session_id)
+    return jsonify({"message": f"🗑️ Sessão {session_id} encerrada"})
+
+@app.route('/sessoes/<session_id>/fork', methods=['POST'])
+def bifurcar_sessao(session_id):
+    """Cria uma nova sessão com uma cópia do estado atual de outra"""
+    new_id = sessions.fork(session_id)
+    if new_id is None:
+        return jsonify({"error": f"❌ Limite de {sessions.max_sessions} sessões atingido"}), 503
+    return jsonify({"sessao": new_id}), 201
+
+@app.route('/sessoes', methods=['GET'])
+def listar_sessoes():
+    """Retorna quantas sessões estão ativas"""
+    return jsonify({"ativas": len(sessions), "limite": sessions.max_sessions})
 
-# Inicializa o motor do jogo
-game_engine = SimpleGameEngine()
 
 # Rotas da API
 @app.route('/tools', methods=['GET'])
 def get_tools():
     """Retorna todas as ferramentas disponíveis"""
-    tools = [
-        {
-            "name": "mover",
-            "description": "Move o jogador na direção especificada",
-            "args": ["direcao"]
-        },
-        {
-            "name": "pontuacao",
-            "description": "Retorna a pontuação atual do jogador",
-            "args": []
-        },
-        {
-            "name": "mapa",
-            "description": "Retorna o desenho do mapa atual",
-            "args": []
-        },
-        {
-            "name": "posicao_jogador",
-            "description": "Retorna a posição atual do jogador",
-            "args": []
-        },
-        {
-            "name": "posicao_recompensa",
-            "description": "Retorna a posição atual da recompensa",
-            "args": []
-        },
-        {
-            "name": "direcoes_validas",
-            "description": "Retorna as direções válidas para movimento",
-            "args": []
-        },
-        {
-            "name": "regras_jogo",
-            "description": "Retorna as regras básicas do jogo",
-            "args": []
-        }
-    ]
-    return jsonify(tools)
+    return STATIC_TOOLS.respond(request)
 
 @app.route('/mover/<direcao>', methods=['GET'])
 def mover(direcao):
     """Move o jogador na direção especificada"""
-    if direcao in game_engine.directions:
-        game_engine.set_move(direcao)
-        return jsonify({"message": f"🎮 Movendo para {direcao}"})
-    else:
-        valid_dirs = ", ".join(game_engine.get_valid_directions())
-        return jsonify({"error": f"❌ Direção inválida. Use: {valid_dirs}"}), 400
+    return tool_response('mover', direcao)
 
 @app.route('/pontuacao', methods=['GET'])
 def pontuacao():
     """Retorna a pontuação atual do jogador"""
-    return jsonify({"pontuacao": f"🏆 Pontuação: {game_engine.get_score()}"})
+    return tool_response('pontuacao')
 
 @app.route('/mapa', methods=['GET'])
 def mapa():
-    """Retorna o desenho do mapa atual"""
-    return jsonify({"mapa": f"🗺️ Mapa atual:\n{game_engine.get_map()}"})
+    """
+    Retorna o desenho do mapa atual, ou de uma janela dele.
+
+    Query: x, y, largura, altura (janela em células; padrão: até 64x64 em volta do jogador)
+    e posicoes=0 para omitir jogador e recompensa. No formato estruturado também
+    codificacao=rle|bits e desde=<versão do mapa>.
+    """
+    args = request.args
+    window = {}
+    for name in ('x', 'y', 'largura', 'altura', 'desde'):
+        if name in args:
+            try:
+                window[name] = int(args[name])
+            except ValueError:
+                return jsonify({"error": f"❌ '{name}' deve ser um inteiro"}), 400
+    window['codificacao'] = args.get('codificacao', map_tiles.RLE)
+    window['posicoes'] = args.get('posicoes', '1') not in ('0', 'false')
+    return conditional(tool_response('mapa', **window))
 
 @app.route('/posicao_jogador', methods=['GET'])
 def posicao_jogador():
     """Retorna a posição atual do jogador"""
-    pos = game_engine.get_player_position()
-    return jsonify({"posicao": f"👤 Posição do jogador: ({pos[0]}, {pos[1]})"})
+    return tool_response('posicao_jogador')
 
 @app.route('/posicao_recompensa', methods=['GET'])
 def posicao_recompensa():
     """Retorna a posição atual da recompensa"""
-    pos = game_engine.get_block_position()
-    return jsonify({"posicao": f"🎯 Posição da recompensa: ({pos[0]}, {pos[1]})"})
+    return tool_response('posicao_recompensa')
 
 @app.route('/direcoes_validas', methods=['GET'])
 def direcoes_validas():
     """Retorna as direções válidas para movimento"""
-    directions = game_engine.get_valid_directions()
-    return jsonify({"direcoes": f"🔄 Direções válidas: {', '.join(directions)}"})
+    return STATIC_DIRECTIONS[response_format()].respond(request)
+
+@app.route('/melhor_direcao', methods=['GET'])
+def melhor_direcao():
+    """Retorna a direção do caminho mais curto até a recompensa"""
+    return tool_response('melhor_direcao')
 
 @app.route('/regras_jogo', methods=['GET'])
 def regras_jogo():
     """Retorna as regras básicas do jogo"""
-    regras = """
-    📖 REGRAS DO JOGO BLOCK PICKER:
-    
-    1. 🎯 OBJETIVO: Coletar o máximo de blocos vermelhos (R) possível
-    2. 🎮 MOVIMENTO: Use as direções up, down, left, right
-    3. 🚫 LIMITES: Não pode sair do tabuleiro (cercado por paredes #)
-    4. 🏆 PONTUAÇÃO: Cada bloco coletado adiciona 1 ponto
-    5. 👤 POSIÇÃO: O jogador é representado por 'P' no mapa
-    6. 🎯 RECOMPENSA: Os blocos vermelhos são representados por 'R'
-    7. ⬜ ESPAÇOS LIVRES: Representados por 'O'
-    8. 🧱 PAREDES: Representadas por '#'
-    
-    O mapa usa coordenadas onde (0,0) é o canto superior esquerdo.
+    return STATIC_RULES[response_format()].respond(request)
+
+@app.route('/step/<direcao>', methods=['GET'])
+def step(direcao):
+    """Aplica uma direção e retorna posições, ganho de pontuação e flag de conclusão"""
+    return tool_response('step', direcao)
+
+@app.route('/rollout', methods=['POST'])
+def rollout():
+    """
+    Executa vários movimentos no servidor contra a sessão.
+
+    Corpo: {"movimentos": ["up", "left", ...]} ou {"n": 100, "politica": "gulosa"}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "❌ Envie um JSON com 'movimentos' ou 'n'"}), 400
+    fmt = response_format()
+    payload, status = game_tools.run_tool(get_engine(), "rollout", data)
+    return format_response(payload, status, fmt)
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """
+    Executa uma lista de chamadas de ferramentas, em ordem, em uma única requisição.
+
+    Corpo: {"sessao": "<id>", "chamadas": [{"ferramenta": "mover", "args": ["up"]}, ...]}
+    Cada chamada pode informar sua própria "sessao"; "args" aceita lista ou dicionário.
+    Retorna uma lista com {"ferramenta", "status", "resultado"} por chamada; no formato
+    estruturado cada "resultado" traz os campos crus da ferramenta.
+    """
+    data = request.get_json(silent=True)
+    calls = data.get('chamadas') if isinstance(data, dict) else None
+    if not isinstance(calls, list):
+        return jsonify({"error": "❌ Envie um JSON com a lista 'chamadas'"}), 400
+    if len(calls) > MAX_BATCH_CALLS:
+        return jsonify({"error": f"❌ Máximo de {MAX_BATCH_CALLS} chamadas por lote"}), 413
+
+    fmt = response_format()
+    structured = fmt != response_formats.TEXT
+    default_session = data.get('sessao', request.args.get('sessao', DEFAULT_SESSION))
+    if not isinstance(default_session, str):
+        return jsonify({"error": "❌ 'sessao' deve ser uma string"}), 400
+    engine = sessions.engine(default_session)
+    results = []
+    for call in calls:
+        if not isinstance(call, dict):
+            results.append({"ferramenta": None, "status": 400,
+                            "resultado": {"error": "❌ Chamada inválida"}})
+            continue
+        name = call.get('ferramenta')
+        if not isinstance(call.get('sessao', ''), str):
+            results.append({"ferramenta": name, "status": 400,
+                            "resultado": {"error": "❌ 'sessao' deve ser uma string"}})
+            continue
+        try:
+            call_engine = sessions.engine(call['sessao']) if 'sessao' in call else engine
+        except SessionNotFound as e:
+            payload, status = {"error": f"❌ Sessão não encontrada: {e.args[0]}"}, 404
+        else:
+            payload, status = game_tools.run_tool(call_engine, name, call.get('args'), structured)
+        results.append({"ferramenta": name, "status": status, "resultado": payload})
+    return format_response(results, 200, fmt)
+
+def apply_obstacles(data) -> Tuple[dict, int]:
+    """
+    Coloca ou remove obstáculos no mapa compartilhado pelas sessões.
+
+    Args:
+        data: Corpo JSON {"celulas": [[x, y], ...], "parede": true} (false remove)
+
+    Returns:
+        Tuple: (resposta, status HTTP)
+    """
+    cells = data.get('celulas') if isinstance(data, dict) else None
+    if not isinstance(cells, list) or not all(
+            isinstance(cell, list) and len(cell) == 2 and all(type(v) is int for v in cell) for cell in cells):
+        return {"error": "❌ Envie um JSON com 'celulas': [[x, y], ...]"}, 400
+    if len(cells) > MAX_OBSTACLE_CELLS:
+        return {"error": f"❌ Máximo de {MAX_OBSTACLE_CELLS} células por requisição"}, 413
+    wall = data.get('parede', True)
+    if not isinstance(wall, bool):
+        return {"error": "❌ 'parede' deve ser true ou false"}, 400
+
+    # Obstáculos e recompensas mudam juntos em relação à criação de sessões
+    with sessions.lock:
+        try:
+            changed = sessions.board.set_cells(cells, WALL if wall else FREE)
+        except ValueError as e:
+            return {"error": f"❌ {e}"}, 400
+        moved = sessions.respawn_blocked_rewards() if changed else 0
+    return {"alteradas": changed, "recompensas_movidas": moved, "versao": sessions.board.version}, 200
+
+@app.route('/obstaculos', methods=['POST'])
+def obstaculos():
+    """
+    Coloca ou remove obstáculos no mapa compartilhado pelas sessões.
+
+    Corpo: {"celulas": [[x, y], ...], "parede": true} (false remove os obstáculos).
+    Recompensas que ficarem sobre um obstáculo são sorteadas de novo.
+    """
+    payload, status = apply_obstacles(request.get_json(silent=True))
+    return jsonify(payload), status
+
+@app.route('/eventos', methods=['GET'])
+def eventos():
+    """
+    Stream Server-Sent Events com o estado da sessão (?sessao=<id>, ou a sessão padrão).
+
+    O estado atual é enviado ao conectar; depois, no máximo um evento `estado` por tick,
+    só quando jogador, recompensa ou pontuação mudarem. `encerrada` fecha o stream.
     """
-    return jsonify({"regras": regras})
+    subscription = broadcaster.subscribe(request.args.get('sessao', DEFAULT_SESSION))
+    if subscription is None:
+        return jsonify({"error": f"❌ Limite de {broadcaster.max_streams} streams atingido"}), 503
+    response = Response(broadcaster.stream(subscription), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Libera a assinatura mesmo se o cliente cair antes do primeiro evento
+    response.call_on_close(lambda: broadcaster.unsubscribe(subscription))
+    return response
 
 @app.route('/health', methods=['GET'])
 def health():
     """Endpoint de saúde"""
-    return jsonify({"status": "healthy", "service": SERVER_NAME})
+    return STATIC_HEALTH.respond(request)
 
 def main():
     """Função principal do servidor MCP"""
@@ -171,15 +336,43 @@ def main():
     print("🔧 Ferramentas disponíveis:")
     print("   🎮 mover(direcao): Move o jogador")
     print("   🏆 pontuacao(): Retorna a pontuação")
-    print("   🗺️ mapa(): Mostra o mapa atual")
+    print("   🗺️ mapa(x, y, largura, altura): Mostra o mapa atual (ou uma janela dele)")
     print("   👤 posicao_jogador(): Posição do jogador")
     print("   🎯 posicao_recompensa(): Posição da recompensa")
     print("   🔄 direcoes_validas(): Lista de direções válidas")
+    print("   🧭 melhor_direcao(): Direção do caminho mais curto até a recompensa")
     print("   📖 regras_jogo(): Regras do jogo")
+    print("   👣 step(direcao): Move e retorna o estado resultante")
+    print("   🔁 rollout(movimentos | n, politica gulosa | caminho): Vários movimentos no servidor")
+    print("📦 Lotes: POST /batch executa várias ferramentas em uma requisição")
+    print("🧾 Formato estruturado: ?formato=json|msgpack ou Accept: "
+          f"{response_formats.STRUCTURED_JSON_TYPE} | {response_formats.MSGPACK_TYPE}")
+    print("🗂️ Sessões: POST /sessoes cria uma partida; use ?sessao=<id> nas ferramentas")
+    board = sessions.board
+    print(f"🗺️ Mapa: {board.cols}x{board.rows}, {len(board.free)} células livres; "
+          "POST /obstaculos altera os obstáculos")
+    print("📡 Eventos: GET /eventos?sessao=<id> envia o estado da sessão por SSE a cada mudança")
+    print("🔌 MCP nativo: --mcp também serve as ferramentas por streamable HTTP (mesmas sessões)")
     print("🛑 Pressione Ctrl+C para parar.")
     
     try:
-        app.run(host='127.0.0.1', port=8000, debug=False)
+        if '--producao' in sys.argv:
+            # Vários processos (MCP_WORKERS, padrão: um por CPU) com afinidade de sessão
+            from serving import run_production
+            run_production(host='127.0.0.1', port=8000)
+        elif '--mcp' in sys.argv:
+            # API REST em uma thread e transporte MCP nativo na principal, sobre o mesmo SessionStore
+            from mcp_native import FASTMCP_AVAILABLE, MCP_NATIVE_PORT, run_http
+            if not FASTMCP_AVAILABLE:
+                print("🚨 fastmcp não está instalado: pip install fastmcp")
+                return
+            threading.Thread(
+                target=app.run, kwargs={'host': '127.0.0.1', 'port': 8000, 'debug': False}, daemon=True
+            ).start()
+            print(f"🔌 MCP nativo em http://127.0.0.1:{MCP_NATIVE_PORT}/mcp")
+            run_http(sessions)
+        else:
+            app.run(host='127.0.0.1', port=8000, debug=False)
     except KeyboardInterrupt:
         print("\n🛑 Servidor MCP interrompido pelo usuário")
     except Exception as e:
@@ -0,0 +1,256 @@
+"""
+Transporte MCP nativo do Oráculo (FastMCP).
+Expõe as mesmas ferramentas da API REST por stdio ou streamable HTTP, com
+resultados estruturados e tipados em vez de textos formatados. Cada sessão MCP
+ganha sua própria partida no SessionStore na primeira chamada e continua com
+ela enquanto o canal estiver em uso (partidas de sessões HTTP sem chamadas por
+MCP_SESSION_TTL segundos são encerradas); `sessao` permite usar uma sessão
+criada pela API REST quando os dois transportes compartilham o mesmo processo.
+
+Uso:
+    python mcp_native.py          # stdio (o cliente inicia o servidor como subprocesso)
+    python mcp_native.py --http   # streamable HTTP em 127.0.0.1:MCP_NATIVE_PORT/mcp
+"""
+
+import inspect
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Literal, Optional, Union
+
+try:
+    # O pydantic (usado pelo fastmcp) exige esta versão do TypedDict antes do Python 3.12
+    from typing_extensions import TypedDict
+except ImportError:
+    from typing import TypedDict
+
+try:
+    from fastmcp import Context, FastMCP
+    from fastmcp.exceptions import ToolError
+    FASTMCP_AVAILABLE = True
+except ImportError:
+    FASTMCP_AVAILABLE = False
+    FastMCP = None
+    Context = Any
+
+import game_tools
+from session_store import SessionNotFound, SessionStore
+
+SERVER_NAME = "Block Picker Game Rules MCP"
+MCP_NATIVE_PORT = int(os.getenv("MCP_NATIVE_PORT", "8001"))
+# Segundos sem chamadas até a partida de uma sessão MCP ser encerrada (o fim da sessão
+# MCP não é sinalizado ao servidor, então clientes que somem seriam partidas perdidas)
+MCP_SESSION_TTL = float(os.getenv("MCP_SESSION_TTL", "600"))
+STDIO_SESSION = 'stdio'
+
+Direcao = Literal['up', 'down', 'left', 'right']
+Codificacao = Literal['rle', 'bits']
+
+
+class Posicao(TypedDict):
+    x: int
+    y: int
+
+
+class ResultadoMovimento(TypedDict):
+    jogador: List[int]
+    recompensa: List[int]
+    pontuacao: int
+    moveu: bool
+    coletou: bool
+
+
+class ResultadoStep(TypedDict):
+    jogador: List[int]
+    recompensa: List[int]
+    pontuacao: int
+    delta_pontuacao: int
+    done: bool
+
+
+class ResultadoRollout(TypedDict):
+    jogador: List[int]
+    recompensa: List[int]
+    pontuacao: int
+    passos: int
+    delta_pontuacao: int
+
+
+class MelhorDirecao(TypedDict):
+    direcao: Optional[Direcao]
+    distancia: Optional[int]
+
+
+class Pontuacao(TypedDict):
+    pontuacao: int
+
+
+class _TileVersao(TypedDict):
+    tx: int
+    ty: int
+    versao: int
+
+
+class Tile(_TileVersao, total=False):
+    # Ausente quando o tile não mudou desde a versão `desde` pedida
+    dados: Union[List[int], str]
+
+
+class _MapaTiles(TypedDict):
+    largura: int
+    altura: int
+    tamanho_tile: int
+    versao: int
+    janela: List[int]
+    codificacao: Codificacao
+    tiles: List[Tile]
+
+
+class Mapa(_MapaTiles, total=False):
+    # Ausentes quando pedido com posicoes=False
+    jogador: List[int]
+    recompensa: List[int]
+
+
+def build_server(sessions: SessionStore) -> 'FastMCP':
+    """
+    Cria o servidor MCP sobre um SessionStore (o mesmo da API REST, se compartilhado).
+
+    Args:
+        sessions: Armazenamento das partidas
+
+    Returns:
+        FastMCP: Servidor pronto para `run(transport=...)`
+    """
+    mcp = FastMCP(SERVER_NAME, instructions=inspect.cleandoc(game_tools.REGRAS_JOGO))
+    # Sessão MCP -> [sessão do jogo criada para ela, instante da última chamada]
+    bound_sessions: Dict[str, List[Any]] = {}
+    bind_lock = threading.Lock()
+    next_sweep = [time.monotonic() + MCP_SESSION_TTL]
+
+    def release_idle(now: float):
+        """Encerra as partidas de sessões MCP sem chamadas há mais de MCP_SESSION_TTL"""
+        for key, (sessao, last_used) in list(bound_sessions.items()):
+            if key != STDIO_SESSION and now - last_used > MCP_SESSION_TTL:
+                del bound_sessions[key]
+                sessions.close(sessao)
+        next_sweep[0] = now + MCP_SESSION_TTL / 10
+
+    def engine(ctx: Context, sessao: Optional[str]):
+        """Motor da sessão explícita, ou da partida associada à sessão MCP do cliente"""
+        if sessao is None:
+            key = ctx.session_id or STDIO_SESSION
+            now = time.monotonic()
+            with bind_lock:
+                if now >= next_sweep[0]:
+                    release_idle(now)
+                binding = bound_sessions.get(key)
+                if binding is None or binding[0] not in sessions:
+                    binding = [sessions.create(), now]
+                    if binding[0] is None:
+                        raise ToolError(f"❌ Limite de {sessions.max_sessions} sessões atingido")
+                    bound_sessions[key] = binding
+                binding[1] = now
+                sessao = binding[0]
+        try:
+            return sessions.engine(sessao)
+        except SessionNotFound:
+            raise ToolError(f"❌ Sessão não encontrada: {sessao}") from None
+
+    # Ferramentas chamadas a cada movimento não anunciam output schema: o SDK revalida o resultado
+    # contra o JSON Schema nas duas pontas de cada chamada, o que custa ~10x a própria chamada.
+    # O resultado continua estruturado (dict com os campos dos TypedDicts acima).
+    per_move_tool = mcp.tool(output_schema=None)
+
+    def checked(result: game_tools.ToolResult) -> Dict[str, Any]:
+        payload, status = result
+        if status >= 400:
+            raise ToolError(payload["error"])
+        return payload
+
+    @per_move_tool
+    def mover(direcao: Direcao, ctx: Context, sessao: Optional[str] = None) -> ResultadoMovimento:
+        """Move o jogador na direção especificada"""
+        return checked(game_tools.mover_dados(engine(ctx, sessao), direcao))
+
+    @per_move_tool
+    def pontuacao(ctx: Context, sessao: Optional[str] = None) -> Pontuacao:
+        """Retorna a pontuação atual do jogador"""
+        return checked(game_tools.pontuacao_dados(engine(ctx, sessao)))
+
+    @mcp.tool
+    def mapa(ctx: Context, x: Optional[int] = None, y: Optional[int] = None,
+             largura: Optional[int] = None, altura: Optional[int] = None,
+             codificacao: Codificacao = 'rle', desde: Optional[int] = None,
+             posicoes: bool = True, sessao: Optional[str] = None) -> Mapa:
+        """
+        Retorna os tiles do mapa que cobrem a janela (padrão: até 64x64 em volta do jogador) e as
+        posições do jogador e da recompensa. Cada tile tem só paredes e células livres, em `rle`
+        (sequências alternadas, começando pelas livres) ou `bits` (1 = parede, em base64); com
+        `desde`, só os tiles alterados depois dessa versão do mapa trazem `dados`; com
+        `posicoes=False`, jogador e recompensa são omitidos.
+        """
+        return checked(game_tools.mapa_dados(engine(ctx, sessao), x, y, largura, altura,
+                                             codificacao, desde, posicoes))
+
+    @per_move_tool
+    def posicao_jogador(ctx: Context, sessao: Optional[str] = None) -> Posicao:
+        """Retorna a posição atual do jogador"""
+        return checked(game_tools.posicao_jogador_dados(engine(ctx, sessao)))
+
+    @per_move_tool
+    def posicao_recompensa(ctx: Context, sessao: Optional[str] = None) -> Posicao:
+        """Retorna a posição atual da recompensa"""
+        return checked(game_tools.posicao_recompensa_dados(engine(ctx, sessao)))
+
+    @mcp.tool
+    def direcoes_validas() -> List[str]:
+        """Retorna as direções válidas para movimento"""
+        return list(game_tools.SimpleGameEngine.directions)
+
+    @per_move_tool
+    def melhor_direcao(ctx: Context, sessao: Optional[str] = None) -> MelhorDirecao:
+        """Retorna a direção do caminho mais curto até a recompensa e a distância em passos (nulas se não houver caminho)"""
+        return checked(game_tools.melhor_direcao_dados(engine(ctx, sessao)))
+
+    @mcp.tool
+    def regras_jogo() -> str:
+        """Retorna as regras básicas do jogo"""
+        return checked(game_tools.regras_jogo_dados(None))["regras"]
+
+    @per_move_tool
+    def step(direcao: Direcao, ctx: Context, sessao: Optional[str] = None) -> ResultadoStep:
+        """Move o jogador e retorna posições, ganho de pontuação e se a recompensa foi coletada"""
+        return checked(game_tools.step(engine(ctx, sessao), direcao))
+
+    @per_move_tool
+    def rollout(ctx: Context, movimentos: Optional[List[Direcao]] = None, n: int = 0,
+                politica: str = "gulosa", sessao: Optional[str] = None) -> ResultadoRollout:
+        """Executa uma lista de movimentos, ou n passos de uma política ("gulosa" ou "caminho"), no servidor"""
+        return checked(game_tools.rollout(engine(ctx, sessao), movimentos, n, politica))
+
+    return mcp
+
+
+def run_http(sessions: SessionStore, host: str = '127.0.0.1', port: int = MCP_NATIVE_PORT):
+    """Serve o transporte streamable HTTP em http://host:port/mcp"""
+    build_server(sessions).run(transport='http', host=host, port=port, show_banner=False)
+
+
+def main():
+    """Inicia o servidor MCP nativo isolado (stdio por padrão, --http para streamable HTTP)"""
+    if not FASTMCP_AVAILABLE:
+        print("🚨 fastmcp não está instalado: pip install fastmcp", file=sys.stderr)
+        sys.exit(1)
+    sessions = SessionStore()
+    if '--http' in sys.argv:
+        print(f"🔌 Servidor MCP nativo em http://127.0.0.1:{MCP_NATIVE_PORT}/mcp")
+        run_http(sessions)
+    else:
+        # Em stdio a saída padrão é o canal do protocolo: nada de prints aqui
+        build_server(sessions).run(transport='stdio', show_banner=False)
+
+
+if __name__ == "__main__":
+    main()
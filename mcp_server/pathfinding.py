@@ -0,0 +1,153 @@
+"""
+Caminhos mínimos no tabuleiro com obstáculos.
+Para cada posição de recompensa há um campo de distâncias (busca em largura a
+partir da recompensa), compartilhado por todas as sessões do tabuleiro: a
+melhor direção de qualquer jogador é o vizinho com distância uma unidade menor,
+uma consulta de tempo constante.
+
+A busca é retomável: ela só avança até alcançar o jogador consultado, e o
+campo guarda a fronteira para continuar se outro jogador, mais longe, consultar
+depois. Quando os obstáculos mudam, só os campos cuja região já explorada foi
+afetada são descartados.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from game_engine import DIRECTIONS, FREE, WALL, Board, GameState
+
+# Orçamento de células dos campos em cache por tabuleiro (4 bytes por célula)
+FIELD_CACHE_CELLS = 16_000_000
+MIN_FIELDS, MAX_FIELDS = 4, 4096
+
+UNREACHED = -1
+
+
+class DistanceField:
+    """Distâncias até uma célula alvo, calculadas sob demanda por busca em largura"""
+
+    __slots__ = ('target', 'dist', 'frontier')
+
+    def __init__(self, board: Board, target: int):
+        self.target = target
+        self.dist = array('i', [UNREACHED]) * len(board.cells)
+        self.dist[target] = 0
+        self.frontier = deque([target])
+
+    def distance(self, board: Board, index: int) -> int:
+        """Distância da célula `index` até o alvo (UNREACHED se não houver caminho)"""
+        dist, frontier, cells = self.dist, self.frontier, board.cells
+        steps = (-board.cols, board.cols, -1, 1)
+        while dist[index] == UNREACHED and frontier:
+            current = frontier.popleft()
+            next_distance = dist[current] + 1
+            for step in steps:
+                neighbor = current + step
+                if dist[neighbor] == UNREACHED and cells[neighbor] == FREE:
+                    dist[neighbor] = next_distance
+                    frontier.append(neighbor)
+        return dist[index]
+
+    def affected_by(self, board: Board, cell: int, indices: Tuple[int, ...]) -> bool:
+        """
+        Verifica se uma alteração de obstáculos pode mudar alguma distância já calculada.
+
+        Uma parede nova só importa se a célula já foi alcançada; uma célula liberada,
+        se algum vizinho já foi alcançado. Fora disso, a alteração está além da
+        fronteira e a busca a encontra normalmente ao continuar.
+        """
+        dist = self.dist
+        if cell == WALL:
+            return any(dist[index] != UNREACHED for index in indices)
+        cols = board.cols
+        return any(dist[index + step] != UNREACHED for index in indices for step in (-cols, cols, -1, 1))
+
+
+class DistanceFields:
+    """Campos de distância por posição de recompensa de um tabuleiro, com descarte LRU"""
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.max_fields = max(MIN_FIELDS, min(MAX_FIELDS, FIELD_CACHE_CELLS // len(board.cells)))
+        self.version = board.version
+        self._fields: 'OrderedDict[int, DistanceField]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def _sync(self):
+        """Aplica as alterações de obstáculos feitas desde a última consulta"""
+        board = self.board
+        if board.version == self.version:
+            return
+        changes = [change for change in board.changes if change[0] > self.version]
+        if not changes or changes[0][0] != self.version + 1:
+            # O registro de alterações não alcança a versão conhecida: recomeça do zero
+            self._fields.clear()
+        else:
+            for _, cell, indices in changes:
+                for target in [target for target, field in self._fields.items()
+                               if field.affected_by(board, cell, indices)]:
+                    del self._fields[target]
+        self.version = board.version
+
+    def _field(self, target: int) -> DistanceField:
+        field = self._fields.get(target)
+        if field is None:
+            field = self._fields[target] = DistanceField(self.board, target)
+            if len(self._fields) > self.max_fields:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(target)
+        return field
+
+    def best_direction(self, player: Tuple[int, int],
+                       target: Tuple[int, int]) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Primeira direção de um caminho mínimo do jogador até o alvo.
+
+        Returns:
+            Tuple: (direção, distância em passos); (None, 0) já no alvo e
+            (None, None) se o alvo for inalcançável
+        """
+        board = self.board
+        cols = board.cols
+        index = player[1] * cols + player[0]
+        with self._lock:
+            self._sync()
+            field = self._field(target[1] * cols + target[0])
+            if board.cells[index] != FREE:
+                # Jogador sobre um obstáculo colocado depois que ele chegou ali: sai pelo melhor vizinho
+                exits = [(field.distance(board, index + dy * cols + dx), direction)
+                         for direction, (dx, dy) in DIRECTIONS.items()
+                         if board.cells[index + dy * cols + dx] == FREE]
+                exits = [(distance, direction) for distance, direction in exits if distance != UNREACHED]
+                if not exits:
+                    return None, None
+                distance, direction = min(exits)
+                return direction, distance + 1
+            distance = field.distance(board, index)
+            if distance == UNREACHED:
+                return None, None
+            if distance == 0:
+                return None, 0
+            dist = field.dist
+            for direction, (dx, dy) in DIRECTIONS.items():
+                if dist[index + dy * cols + dx] == distance - 1:
+                    return direction, distance
+        return None, None
+
+
+@lru_cache(maxsize=16)
+def distance_fields(board: Board) -> DistanceFields:
+    """Campos de distância do tabuleiro, compartilhados por todas as sessões e agentes"""
+    return DistanceFields(board)
+
+
+def best_direction(board: Board, state: GameState) -> Tuple[Optional[str], Optional[int]]:
+    """Melhor direção e distância do jogador até a recompensa no estado `state`"""
+    return distance_fields(board).best_direction((state.px, state.py), (state.bx, state.by))
@@ -0,0 +1,163 @@
+"""
+Formatos de resposta das ferramentas do Oráculo.
+Por padrão as rotas respondem com os textos formatados de sempre; clientes que
+pedem o formato estruturado (cabeçalho Accept ou `?formato=`) recebem os campos
+crus das ferramentas `*_dados`, em JSON compacto ou msgpack, serializados
+diretamente em bytes.
+
+Uso:
+    python response_formats.py   # compara CPU de serialização e tamanho dos formatos
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional
+
+from flask import Response
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+# Formatos aceitos em ?formato=
+TEXT = 'texto'
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+STRUCTURED_JSON_TYPE = 'application/vnd.blockpicker+json'
+MSGPACK_TYPE = 'application/msgpack'
+# Tipos de mídia do cabeçalho Accept e o formato que cada um seleciona
+MEDIA_TYPES = {
+    'application/json': TEXT,
+    STRUCTURED_JSON_TYPE: JSON,
+    MSGPACK_TYPE: MSGPACK,
+    'application/x-msgpack': MSGPACK,
+    'application/vnd.msgpack': MSGPACK
+}
+CONTENT_TYPES = {JSON: STRUCTURED_JSON_TYPE, MSGPACK: MSGPACK_TYPE}
+
+# Limite de cabeçalhos Accept distintos memorizados
+NEGOTIATION_CACHE_SIZE = 64
+
+_negotiated: Dict[str, str] = {}
+# Codificador reutilizado: json.dumps com argumentos não padrão cria um novo a cada chamada
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+class UnsupportedFormat(ValueError):
+    """Formato pedido em ?formato= desconhecido ou indisponível neste servidor"""
+
+
+def available_formats() -> tuple:
+    """Formatos que este servidor consegue produzir"""
+    return (TEXT, JSON, MSGPACK) if MSGPACK_AVAILABLE else (TEXT, JSON)
+
+
+def _parse_accept(accept: str) -> str:
+    """Formato do tipo de mídia conhecido com maior peso em Accept (o primeiro em caso de empate; texto se nenhum)"""
+    best, best_quality = TEXT, 0.0
+    for item in accept.split(','):
+        media_type, *params = item.split(';')
+        fmt = MEDIA_TYPES.get(media_type.strip().lower())
+        if fmt is None or fmt not in available_formats():
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best, best_quality = fmt, quality
+    return best
+
+
+def negotiate(query_format: Optional[str], accept: str) -> str:
+    """
+    Escolhe o formato da resposta.
+
+    Args:
+        query_format: Valor de ?formato= (tem prioridade sobre o cabeçalho)
+        accept: Cabeçalho Accept da requisição
+
+    Returns:
+        str: TEXT, JSON ou MSGPACK
+    """
+    if query_format is not None:
+        if query_format not in available_formats():
+            raise UnsupportedFormat(query_format)
+        return query_format
+
+    fmt = _negotiated.get(accept)
+    if fmt is None:
+        fmt = _parse_accept(accept)
+        if len(_negotiated) < NEGOTIATION_CACHE_SIZE:
+            _negotiated[accept] = fmt
+    return fmt
+
+
+def encode(payload: Any, fmt: str) -> bytes:
+    """Serializa um payload estruturado (JSON compacto em UTF-8 ou msgpack)"""
+    if fmt == MSGPACK:
+        return msgpack.packb(payload)
+    return _json_encoder.encode(payload).encode('utf-8')
+
+
+def respond(payload: Any, status: int, fmt: str) -> Response:
+    """Resposta de uma ferramenta no formato estruturado `fmt`"""
+    response = Response(encode(payload, fmt), status=status, content_type=CONTENT_TYPES[fmt])
+    response.vary.add('Accept')
+    return response
+
+
+def benchmark(iterations: int = 20_000) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Mede, por ferramenta, o custo de gerar e serializar a resposta em cada formato.
+
+    O formato texto usa as ferramentas formatadas e o serializador JSON do Flask
+    (o mesmo de jsonify); os estruturados usam as ferramentas `*_dados` e `encode`.
+
+    Returns:
+        Dict: {ferramenta: {formato: {"us": microssegundos por resposta, "bytes": tamanho}}}
+    """
+    from flask import Flask
+
+    import game_tools
+    from game_engine import SimpleGameEngine
+
+    engine = SimpleGameEngine(seed=1)
+    flask_dumps = Flask(__name__).json.dumps
+    tools = ('pontuacao', 'posicao_jogador', 'posicao_recompensa', 'direcoes_validas', 'mapa')
+    formats = {
+        TEXT: lambda name: flask_dumps(game_tools.TOOL_HANDLERS[name](engine)[0]).encode('utf-8'),
+        **{fmt: (lambda name, fmt=fmt: encode(game_tools.STRUCTURED_HANDLERS[name](engine)[0], fmt))
+           for fmt in available_formats() if fmt != TEXT}
+    }
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for name in tools:
+        results[name] = {}
+        for fmt, render in formats.items():
+            start = time.perf_counter()
+            for _ in range(iterations):
+                body = render(name)
+            elapsed = time.perf_counter() - start
+            results[name][fmt] = {"us": elapsed / iterations * 1e6, "bytes": len(body)}
+    return results
+
+
+def main():
+    """Imprime a comparação entre os formatos"""
+    print(f"⏱️ Serialização por resposta (formatos: {', '.join(available_formats())})")
+    for name, formats in benchmark().items():
+        row = "  ".join(f"{fmt}: {stats['us']:5.2f} µs {stats['bytes']:4d} B" for fmt, stats in formats.items())
+        print(f"   {name:<20} {row}")
+
+
+if __name__ == "__main__":
+    main()
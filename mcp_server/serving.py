@@ -0,0 +1,376 @@
+"""
+Modo de produção do Oráculo: vários processos worker com afinidade de sessão.
+Cada worker é um processo com seu próprio SessionStore e servidor WSGI em uma
+porta interna; um roteador na porta pública encaminha cada requisição ao worker
+dono da sessão, identificado pelo prefixo do ID ("<worker>-<token>").
+Requisições sem sessão usam a sessão padrão, que vive no worker 0. Todos os
+workers geram o mesmo mapa (MCP_MAP_SEED), e as alterações de obstáculos são
+repassadas a todos eles e registradas pelo roteador: um worker reiniciado as
+reaplica antes de atender, e um worker que não aplicou uma alteração é
+reiniciado (perdendo as sessões dele) para não ficar com um mapa diferente.
+"""
+
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import select
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+    waitress = None
+
+from werkzeug.serving import make_server
+
+from state_stream import MAX_STREAMS
+
+# Threads por servidor WSGI (workers e roteador) para requisições comuns; cada stream
+# SSE aberto ocupa uma thread a mais enquanto durar
+SERVER_THREADS = 8
+# Intervalo de verificação dos workers pelo supervisor (segundos)
+SUPERVISE_INTERVAL = 1.0
+WORKER_TIMEOUT = 30
+
+# Rotas que não dependem de sessão e podem ir para qualquer worker
+STATELESS_PATHS = frozenset({'/tools', '/regras_jogo', '/direcoes_validas', '/health'})
+# Rotas que alteram o mapa, compartilhado por todas as sessões: repassadas a todos os workers
+BROADCAST_PATHS = frozenset({'/obstaculos'})
+# Rotas com resposta contínua (SSE), repassadas em partes por uma conexão própria
+STREAMING_PATHS = frozenset({'/eventos'})
+# Cabeçalhos hop-by-hop, que não são repassados entre roteador e workers
+HOP_BY_HOP = frozenset({
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade'
+})
+
+class RequestNotSent(ConnectionError):
+    """A conexão caiu antes de a requisição chegar inteira ao worker"""
+
+
+# Falhas de conexão com o worker (conexão ociosa fechada, reiniciada ou recusada)
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError, ConnectionRefusedError,
+    RequestNotSent
+)
+# Métodos que podem ser repetidos mesmo se o worker já tiver processado a requisição
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+Headers = List[Tuple[str, str]]
+
+
+class MixedBatch(ValueError):
+    """Lote com chamadas de sessões que vivem em workers diferentes"""
+
+
+def default_workers() -> int:
+    """Número de workers: MCP_WORKERS, ou um por CPU"""
+    return int(os.getenv('MCP_WORKERS', '0')) or os.cpu_count() or 1
+
+
+def worker_port(port: int, index: int) -> int:
+    """Porta interna do worker `index` para o roteador na porta pública `port`"""
+    return port + 1 + index
+
+
+def session_worker(session_id: str, workers: int) -> int:
+    """Worker dono de uma sessão pelo prefixo do ID (IDs sem prefixo ficam no worker 0)"""
+    prefix, separator, _ = session_id.partition('-')
+    if separator and prefix.isdigit() and int(prefix) < workers:
+        return int(prefix)
+    return 0
+
+
+def serve(app, host: str, port: int, streams: int = MAX_STREAMS):
+    """Serve uma aplicação WSGI com waitress, ou com o servidor multithread do Werkzeug"""
+    if WAITRESS_AVAILABLE:
+        # send_bytes=1: cada evento SSE sai assim que é gerado, sem esperar encher o buffer
+        waitress.serve(app, host=host, port=port, threads=SERVER_THREADS + streams,
+                       send_bytes=1, _quiet=True)
+    else:
+        make_server(host, port, app, threaded=True).serve_forever()
+
+
+def _run_worker(index: int, host: str, port: int, edits: List[bytes] = ()):
+    """Ponto de entrada de um processo worker; `edits` são as alterações de obstáculos já aceitas"""
+    import mcp_game_instance
+    mcp_game_instance.sessions.id_prefix = f"{index}-"
+    for body in edits:
+        mcp_game_instance.apply_obstacles(json.loads(body))
+    serve(mcp_game_instance.app, host, port)
+
+
+class AffinityRouter:
+    """Aplicação WSGI que encaminha cada requisição ao worker dono da sessão"""
+
+    def __init__(self, host: str, ports: List[int], restart_worker: Optional[Callable[[int], None]] = None):
+        self.host = host
+        self.ports = ports
+        self.restart_worker = restart_worker
+        # Alterações de obstáculos aceitas, na ordem, para reaplicar em workers reiniciados
+        self.edits: List[bytes] = []
+        self.edits_lock = threading.Lock()
+        self._next = itertools.count()
+        self._local = threading.local()
+
+    def pick_worker(self, method: str, path: str, query: str, body: bytes) -> Optional[int]:
+        """
+        Escolhe o worker da requisição; None para GET /sessoes, que soma todos os workers.
+
+        Raises:
+            MixedBatch: Se um /batch tiver chamadas de sessões de workers diferentes
+        """
+        workers = len(self.ports)
+        if path in STATELESS_PATHS or (path == '/sessoes' and method == 'POST'):
+            # Rotas sem estado e sessões novas são distribuídas em rodízio
+            return next(self._next) % workers
+        if path == '/sessoes':
+            return None
+        if path.startswith('/sessoes/'):
+            return session_worker(path.split('/')[2], workers)
+
+        session_ids = parse_qs(query).get('sessao')
+        if path == '/batch':
+            return self._batch_worker(session_ids[0] if session_ids else None, body)
+        if session_ids:
+            return session_worker(session_ids[0], workers)
+        return 0
+
+    def _batch_worker(self, query_session: Optional[str], body: bytes) -> int:
+        """
+        Worker de um /batch: o dono das sessões de todas as chamadas.
+
+        Cada worker só conhece as próprias sessões, então o lote não é dividido entre
+        workers: chamadas de sessões de workers diferentes são recusadas (MixedBatch).
+        """
+        workers = len(self.ports)
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            # Corpo inválido: qualquer worker responde com o erro
+            return session_worker(query_session, workers) if query_session else 0
+
+        # Mesma precedência do worker: sessão do corpo, depois a da URL, depois a padrão
+        default = data.get('sessao', query_session)
+        default_owner = session_worker(default, workers) if isinstance(default, str) else 0
+        calls = data.get('chamadas')
+        owners = {session_worker(call['sessao'], workers)
+                  if isinstance(call, dict) and isinstance(call.get('sessao'), str) else default_owner
+                  for call in (calls if isinstance(calls, list) else ())}
+        if len(owners) > 1:
+            raise MixedBatch(sorted(owners))
+        return owners.pop() if owners else default_owner
+
+    def _connection(self, index: int) -> http.client.HTTPConnection:
+        """Conexão keep-alive da thread atual com o worker `index`"""
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        connection = connections.get(index)
+        if connection is not None and connection.sock is not None and \
+                select.select([connection.sock], [], [], 0)[0]:
+            # Conexão ociosa legível: o worker a fechou (EOF) e ela não pode ser reutilizada
+            connection.close()
+            connection = None
+        if connection is None:
+            connection = connections[index] = http.client.HTTPConnection(
+                self.host, self.ports[index], timeout=WORKER_TIMEOUT
+            )
+        return connection
+
+    def forward(self, index: int, method: str, target: str, headers: Headers,
+                body: bytes) -> Tuple[int, Headers, bytes]:
+        """
+        Repassa a requisição ao worker, refazendo a conexão uma vez se ela caiu.
+
+        A requisição só é repetida se não chegou ao worker ou se o método é idempotente:
+        uma conexão que cai depois do envio pode ter sido processada (ex.: /mover), e
+        repeti-la aplicaria a ação duas vezes; nesse caso a falha vira 502.
+        """
+        try:
+            return self._request(index, method, target, headers, body)
+        except STALE_CONNECTION_ERRORS as e:
+            self._local.connections.pop(index).close()
+            if not isinstance(e, RequestNotSent) and method not in IDEMPOTENT_METHODS:
+                raise
+            return self._request(index, method, target, headers, body)
+
+    def _request(self, index: int, method: str, target: str, headers: Headers,
+                 body: bytes) -> Tuple[int, Headers, bytes]:
+        connection = self._connection(index)
+        try:
+            connection.request(method, target, body=body, headers=dict(headers))
+        except STALE_CONNECTION_ERRORS as e:
+            raise RequestNotSent(*e.args) from e
+        response = connection.getresponse()
+        return response.status, response.getheaders(), response.read()
+
+    def stream(self, index: int, target: str, headers: Headers) -> Tuple[int, Headers, Iterable[bytes]]:
+        """Repassa uma resposta contínua do worker em partes, por uma conexão exclusiva"""
+        connection = http.client.HTTPConnection(self.host, self.ports[index], timeout=None)
+        connection.request('GET', target, headers=dict(headers))
+        response = connection.getresponse()
+
+        def chunks() -> Iterable[bytes]:
+            try:
+                while True:
+                    data = response.read1(65536)
+                    if not data:
+                        return
+                    yield data
+            finally:
+                connection.close()
+
+        return response.status, response.getheaders(), chunks()
+
+    def _broadcast(self, method: str, target: str, headers: Headers,
+                   body: bytes) -> Tuple[int, Headers, bytes]:
+        """
+        Repassa uma alteração do mapa a todos os workers e responde com a do worker 0.
+
+        O worker 0 valida a alteração; se ela for aceita, entra no registro e vai para
+        os demais. Um worker que falhar ou responder diferente é reiniciado e reaplica o
+        registro, em vez de continuar com um mapa divergente.
+        """
+        with self.edits_lock:
+            try:
+                result = self.forward(0, method, target, headers, body)
+            except (http.client.HTTPException, OSError):
+                # Não se sabe se o worker 0 aplicou a alteração: reinicia sem ela
+                self._restart(0)
+                raise
+            if not 200 <= result[0] < 300:
+                return result
+            self.edits.append(body)
+            for index in range(1, len(self.ports)):
+                try:
+                    status = self.forward(index, method, target, headers, body)[0]
+                except (http.client.HTTPException, OSError):
+                    status = None
+                if status != result[0]:
+                    self._restart(index)
+            return result
+
+    def _restart(self, index: int):
+        if self.restart_worker is not None:
+            print(f"⚠️ Worker {index} não aplicou a alteração de obstáculos; reiniciando")
+            self.restart_worker(index)
+
+    def _sum_sessions(self, headers: Headers) -> bytes:
+        totals = {'ativas': 0, 'limite': 0}
+        for index in range(len(self.ports)):
+            _, _, data = self.forward(index, 'GET', '/sessoes', headers, b'')
+            counts = json.loads(data)
+            for key in totals:
+                totals[key] += counts.get(key, 0)
+        totals['workers'] = len(self.ports)
+        return json.dumps(totals).encode('utf-8')
+
+    def __call__(self, environ, start_response) -> Iterable[bytes]:
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO', '/')
+        query = environ.get('QUERY_STRING', '')
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        body = environ['wsgi.input'].read(length) if length else b''
+
+        headers = [(key[5:].replace('_', '-').title(), value)
+                   for key, value in environ.items() if key.startswith('HTTP_')]
+        headers = [(key, value) for key, value in headers if key.lower() not in HOP_BY_HOP]
+        if environ.get('CONTENT_TYPE'):
+            headers.append(('Content-Type', environ['CONTENT_TYPE']))
+
+        try:
+            index = self.pick_worker(method, path, query, body)
+        except MixedBatch as e:
+            data = json.dumps({"error": f"❌ O lote mistura sessões dos workers {e.args[0]}; "
+                                        f"envie um lote por worker (prefixo do ID da sessão)"}).encode('utf-8')
+            start_response('400 Bad Request', [('Content-Type', 'application/json'),
+                                               ('Content-Length', str(len(data)))])
+            return [data]
+        target = f"{path}?{query}" if query else path
+        if path in STREAMING_PATHS and method == 'GET':
+            try:
+                status, response_headers, chunks = self.stream(index, target, headers)
+            except OSError as e:
+                status, response_headers = 502, [('Content-Type', 'application/json')]
+                chunks = [json.dumps({"error": f"❌ Worker indisponível: {e}"}).encode('utf-8')]
+            response_headers = [(key, value) for key, value in response_headers
+                                if key.lower() not in HOP_BY_HOP and key.lower() != 'content-length']
+            start_response(f"{status} {http.client.responses.get(status, '')}", response_headers)
+            return chunks
+
+        try:
+            if path in BROADCAST_PATHS:
+                status, response_headers, data = self._broadcast(method, target, headers, body)
+            elif index is None:
+                status, response_headers, data = 200, [('Content-Type', 'application/json')], \
+                    self._sum_sessions(headers)
+            else:
+                status, response_headers, data = self.forward(index, method, target, headers, body)
+        except (http.client.HTTPException, OSError) as e:
+            status, response_headers = 502, [('Content-Type', 'application/json')]
+            data = json.dumps({"error": f"❌ Worker indisponível: {e}"}).encode('utf-8')
+
+        response_headers = [(key, value) for key, value in response_headers
+                            if key.lower() not in HOP_BY_HOP and key.lower() != 'content-length']
+        response_headers.append(('Content-Length', str(len(data))))
+        start_response(f"{status} {http.client.responses.get(status, '')}", response_headers)
+        return [data]
+
+
+def run_production(host: str = '127.0.0.1', port: int = 8000, workers: Optional[int] = None):
+    """
+    Inicia `workers` processos do Oráculo e o roteador com afinidade de sessão.
+
+    Os workers mortos são reiniciados pelo supervisor (as sessões deles são perdidas)
+    e reaplicam as alterações de obstáculos registradas pelo roteador.
+    """
+    workers = workers or default_workers()
+    ports = [worker_port(port, index) for index in range(workers)]
+    context = multiprocessing.get_context('spawn')
+    processes: Dict[int, multiprocessing.Process] = {}
+    # Encerrado, o worker é reiniciado pelo supervisor com o registro de alterações
+    router = AffinityRouter('127.0.0.1', ports, restart_worker=lambda index: processes[index].terminate())
+
+    def start_worker(index: int):
+        with router.edits_lock:
+            edits = list(router.edits)
+        process = context.Process(target=_run_worker, args=(index, '127.0.0.1', ports[index], edits),
+                                  daemon=True)
+        process.start()
+        processes[index] = process
+
+    for index in range(workers):
+        start_worker(index)
+
+    def supervise():
+        while True:
+            time.sleep(SUPERVISE_INTERVAL)
+            for index, process in list(processes.items()):
+                if not process.is_alive():
+                    print(f"⚠️ Worker {index} terminou (código {process.exitcode}); reiniciando")
+                    start_worker(index)
+
+    threading.Thread(target=supervise, daemon=True).start()
+    # SIGTERM também precisa encerrar os workers (o finally abaixo não roda no handler padrão)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = 'waitress' if WAITRESS_AVAILABLE else 'Werkzeug multithread (instale waitress para produção)'
+    print(f"🏭 Modo produção: {workers} workers nas portas {ports[0]}-{ports[-1]}, "
+          f"roteador em {host}:{port} ({server})")
+    try:
+        # O roteador repassa os streams de todos os workers
+        serve(router, host, port, streams=MAX_STREAMS * workers)
+    finally:
+        for process in processes.values():
+            process.terminate()
@@ -0,0 +1,195 @@
+"""
+Armazenamento de sessões do Oráculo MCP.
+Cada sessão é uma partida independente; o estado de todas fica em arrays
+paralelos (estrutura de arrays) em vez de um objeto Python por sessão.
+"""
+
+import os
+import secrets
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from game_engine import BLOCK_SIZE, FREE, HEIGHT, WIDTH, Board, GameState, SimpleGameEngine, initial_state
+
+# Limite padrão de sessões simultâneas por processo
+MAX_SESSIONS = 100_000
+
+# Tabuleiro das sessões: dimensões, fração de obstáculos e semente do sorteio deles.
+# A semente fixa faz todos os workers do modo produção gerarem o mesmo mapa.
+MAP_COLS = int(os.getenv('MCP_MAP_COLS', str(WIDTH // BLOCK_SIZE)))
+MAP_ROWS = int(os.getenv('MCP_MAP_ROWS', str(HEIGHT // BLOCK_SIZE)))
+MAP_OBSTACLES = float(os.getenv('MCP_MAP_OBSTACLES', '0'))
+MAP_SEED = int(os.getenv('MCP_MAP_SEED', '0'))
+
+
+def default_board() -> Board:
+    """Tabuleiro configurado por MCP_MAP_COLS, MCP_MAP_ROWS, MCP_MAP_OBSTACLES e MCP_MAP_SEED"""
+    return Board.generate(MAP_COLS, MAP_ROWS, MAP_OBSTACLES, MAP_SEED)
+
+
+class SessionNotFound(KeyError):
+    """Sessão inexistente ou já encerrada"""
+
+
+class SessionStore:
+    """Gerencia milhares de partidas independentes em arrays compactos"""
+
+    def __init__(self, board: Optional[Board] = None, max_sessions: int = MAX_SESSIONS,
+                 id_prefix: str = ""):
+        self.board = board if board is not None else default_board()
+        self.max_sessions = max_sessions
+        # Prefixo dos IDs criados; no modo multiprocesso identifica o worker dono da sessão
+        self.id_prefix = id_prefix
+        # Uma entrada por slot em cada array
+        self.px = array('h')
+        self.py = array('h')
+        self.bx = array('h')
+        self.by = array('h')
+        self.score = array('q')
+        self.rng = array('I')
+        # Incrementada a cada escrita do estado; quem observa a sessão compara versões
+        self.version = array('Q')
+        self.slot_ids: List[Optional[str]] = []
+        self.free_slots: List[int] = []
+        self.ids: Dict[str, int] = {}
+        # Protege a alocação e a liberação de slots (threads do servidor WSGI e laço do MCP);
+        # reentrante porque fork() chama create()
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.ids
+
+    def create(self, seed: Optional[int] = None) -> Optional[str]:
+        """
+        Cria uma nova sessão, reaproveitando slots liberados.
+
+        Args:
+            seed: Semente opcional para reproduzir a partida
+
+        Returns:
+            str: ID da sessão, ou None se o limite de sessões foi atingido
+        """
+        with self.lock:
+            if len(self.ids) >= self.max_sessions:
+                return None
+            # Sorteado sob o lock: uma alteração de obstáculos não escapa de respawn_blocked_rewards
+            state = initial_state(self.board, seed)
+
+            session_id = self.id_prefix + secrets.token_hex(8)
+            while session_id in self.ids:
+                session_id = self.id_prefix + secrets.token_hex(8)
+
+            if self.free_slots:
+                slot = self.free_slots.pop()
+                self.set_state(slot, state)
+                self.slot_ids[slot] = session_id
+            else:
+                slot = len(self.slot_ids)
+                self.px.append(state.px)
+                self.py.append(state.py)
+                self.bx.append(state.bx)
+                self.by.append(state.by)
+                self.score.append(state.score)
+                self.rng.append(state.rng)
+                self.version.append(0)
+                self.slot_ids.append(session_id)
+
+            self.ids[session_id] = slot
+            return session_id
+
+    def fork(self, session_id: str) -> Optional[str]:
+        """
+        Cria uma nova sessão com uma cópia do estado de `session_id`.
+
+        Returns:
+            str: ID da nova sessão, ou None se o limite de sessões foi atingido
+        """
+        with self.lock:
+            state = self.get_state(self.slot(session_id))
+            new_id = self.create()
+            if new_id is not None:
+                self.set_state(self.ids[new_id], state)
+            return new_id
+
+    def close(self, session_id: str) -> bool:
+        """Encerra uma sessão e libera seu slot para reuso"""
+        with self.lock:
+            slot = self.ids.pop(session_id, None)
+            if slot is None:
+                return False
+            self.slot_ids[slot] = None
+            self.version[slot] += 1
+            self.free_slots.append(slot)
+            return True
+
+    def slot(self, session_id: str) -> int:
+        """Retorna o slot da sessão ou lança SessionNotFound"""
+        try:
+            return self.ids[session_id]
+        except KeyError:
+            raise SessionNotFound(session_id) from None
+
+    def respawn_blocked_rewards(self) -> int:
+        """
+        Sorteia de novo as recompensas que ficaram sobre obstáculos (depois de Board.set_cells).
+
+        Percorre as sessões sob o lock, então sessões criadas ou encerradas ao mesmo
+        tempo não interrompem a varredura.
+
+        Returns:
+            int: Quantas recompensas foram movidas
+        """
+        board = self.board
+        cells, cols = board.cells, board.cols
+        moved = 0
+        with self.lock:
+            for slot in list(self.ids.values()):
+                if cells[self.by[slot] * cols + self.bx[slot]] == FREE:
+                    continue
+                state = self.get_state(slot)
+                bx, by, rng = board.random_cell(state.rng, (state.px, state.py))
+                self.set_state(slot, state._replace(bx=bx, by=by, rng=rng))
+                moved += 1
+        return moved
+
+    def get_state(self, slot: int) -> GameState:
+        return GameState(
+            self.px[slot], self.py[slot], self.bx[slot], self.by[slot],
+            self.score[slot], self.rng[slot]
+        )
+
+    def set_state(self, slot: int, state: GameState):
+        self.px[slot] = state.px
+        self.py[slot] = state.py
+        self.bx[slot] = state.bx
+        self.by[slot] = state.by
+        self.score[slot] = state.score
+        self.rng[slot] = state.rng
+        self.version[slot] += 1
+
+    def engine(self, session_id: str) -> 'SessionEngine':
+        """Retorna uma visão com a interface do SimpleGameEngine para a sessão"""
+        return SessionEngine(self, self.slot(session_id))
+
+
+class SessionEngine(SimpleGameEngine):
+    """Visão temporária de uma sessão; o estado continua nos arrays do SessionStore"""
+
+    __slots__ = ('store', 'slot')
+
+    def __init__(self, store: SessionStore, slot: int):
+        self.store = store
+        self.slot = slot
+        self.board = store.board
+
+    @property
+    def state(self) -> GameState:
+        return self.store.get_state(self.slot)
+
+    @state.setter
+    def state(self, value: GameState):
+        self.store.set_state(self.slot, value)
@@ -0,0 +1,155 @@
+"""
+Assinatura do estado das sessões por Server-Sent Events.
+Em vez de consultar /posicao_jogador e /posicao_recompensa em laço, o cliente
+mantém uma conexão aberta em /eventos e recebe o estado da sessão sempre que
+ele muda. Uma única thread compara, a cada tick, a versão das sessões assinadas
+no SessionStore: várias jogadas no mesmo tick viram um único evento, e sessões
+sem mudança (ou sem assinantes) não custam nada.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import response_formats
+from game_engine import GameState
+from session_store import SessionStore
+
+# Intervalo entre publicações (o tabuleiro roda a 10 FPS)
+PUSH_TICK_SECONDS = float(os.getenv('MCP_PUSH_TICK', '0.1'))
+# Comentário SSE enviado quando não há mudanças, para manter a conexão (e proxies) viva
+KEEPALIVE_SECONDS = 15.0
+# Streams simultâneos por processo (cada um ocupa uma thread do servidor WSGI)
+MAX_STREAMS = int(os.getenv('MCP_MAX_STREAMS', '64'))
+
+
+def _json(payload) -> str:
+    return response_formats.encode(payload, response_formats.JSON).decode('utf-8')
+
+
+class Subscription:
+    """Um stream aberto: guarda só o estado mais recente ainda não enviado"""
+
+    __slots__ = ('session_id', 'slot', 'ready', 'state', 'tick', 'closed')
+
+    def __init__(self, session_id: str, slot: int):
+        self.session_id = session_id
+        self.slot = slot
+        self.ready = threading.Event()
+        self.state: Optional[GameState] = None
+        self.tick = 0
+        self.closed = False
+
+
+class StateBroadcaster:
+    """Publica, uma vez por tick, o estado das sessões assinadas que mudaram"""
+
+    def __init__(self, store: SessionStore, tick_seconds: float = PUSH_TICK_SECONDS,
+                 max_streams: int = MAX_STREAMS):
+        self.store = store
+        self.tick_seconds = tick_seconds
+        self.max_streams = max_streams
+        self.tick = 0
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, List[Subscription]] = {}
+        # Última versão publicada de cada slot assinado
+        self._versions: Dict[int, int] = {}
+        self._streams = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return self._streams
+
+    def subscribe(self, session_id: str) -> Optional[Subscription]:
+        """
+        Abre um stream para a sessão, já com o estado atual pronto para envio.
+
+        Returns:
+            Subscription: Assinatura, ou None se o limite de streams foi atingido
+
+        Raises:
+            SessionNotFound: Se a sessão não existir
+        """
+        slot = self.store.slot(session_id)
+        subscription = Subscription(session_id, slot)
+        with self._lock:
+            if self._streams >= self.max_streams:
+                return None
+            self._streams += 1
+            self._subscribers.setdefault(slot, []).append(subscription)
+            self._versions.setdefault(slot, self.store.version[slot])
+            subscription.state = self.store.get_state(slot)
+            subscription.tick = self.tick
+            subscription.ready.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='state-broadcaster', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a assinatura (pode ser chamado mais de uma vez)"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.slot)
+            if not subscribers or subscription not in subscribers:
+                return
+            subscribers.remove(subscription)
+            self._streams -= 1
+            if not subscribers:
+                del self._subscribers[subscription.slot]
+                del self._versions[subscription.slot]
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick_seconds)
+            self.publish()
+
+    def publish(self):
+        """Avança um tick e acorda os streams das sessões cuja versão mudou"""
+        store = self.store
+        with self._lock:
+            self.tick += 1
+            for slot, subscribers in self._subscribers.items():
+                version = store.version[slot]
+                if version == self._versions[slot]:
+                    continue
+                self._versions[slot] = version
+                state = store.get_state(slot)
+                owner = store.slot_ids[slot]
+                for subscription in subscribers:
+                    if owner != subscription.session_id:
+                        # Sessão encerrada (o slot pode até já ser de outra sessão)
+                        subscription.closed = True
+                    else:
+                        subscription.state = state
+                        subscription.tick = self.tick
+                    subscription.ready.set()
+
+    def stream(self, subscription: Subscription) -> Iterator[str]:
+        """
+        Gera os eventos SSE de uma assinatura: `estado` a cada mudança e `encerrada` no fim.
+
+        Cada `estado` traz jogador, recompensa, pontuação e o tick da publicação (também no `id`).
+        """
+        sent = None
+        while True:
+            if not subscription.ready.wait(KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+                continue
+            subscription.ready.clear()
+            if subscription.closed:
+                yield f"event: encerrada\ndata: {_json({'sessao': subscription.session_id})}\n\n"
+                return
+            state, tick = subscription.state, subscription.tick
+            snapshot = (state.px, state.py, state.bx, state.by, state.score)
+            if snapshot == sent:
+                # Mudou e voltou (ou só o gerador avançou) desde o último envio
+                continue
+            sent = snapshot
+            payload = {
+                "jogador": [state.px, state.py],
+                "recompensa": [state.bx, state.by],
+                "pontuacao": state.score,
+                "tick": tick
+            }
+            yield f"event: estado\nid: {tick}\ndata: {_json(payload)}\n\n"
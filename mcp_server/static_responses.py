@@ -0,0 +1,147 @@
+"""
+Respostas pré-computadas para as rotas estáticas do Oráculo.
+O corpo (JSON, ou o formato estruturado negociado pelo Accept) é serializado
+uma única vez na inicialização, junto com as variantes gzip e brotli e seus
+ETags fortes; cada requisição só escolhe os bytes já prontos conforme o
+Accept-Encoding do cliente. A variante brotli só existe com o pacote `brotli`
+instalado (opcional).
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Response
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+import response_formats
+
+# O conteúdo só muda com uma nova versão do servidor; o ETag cobre a revalidação
+CACHE_CONTROL = 'public, max-age=300'
+# Codificações em ordem de preferência quando o cliente as aceita com o mesmo peso
+COMPRESSED_ENCODINGS = ('br', 'gzip')
+# Limite de cabeçalhos Accept-Encoding distintos memorizados
+NEGOTIATION_CACHE_SIZE = 64
+
+Headers = List[Tuple[str, str]]
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Converte 'gzip, br;q=0.8' em {'gzip': 1.0, 'br': 0.8}"""
+    weights = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.lower()] = quality
+    return weights
+
+
+def _parse_if_none_match(header: str) -> Tuple[str, ...]:
+    """Converte '"a", W/"b"' em ('"a"', '"b"'); a comparação do If-None-Match é fraca"""
+    tags = []
+    for item in header.split(','):
+        tag = item.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tuple(tags)
+
+
+class StaticResponse:
+    """Representações prontas (bytes, cabeçalhos) de um payload imutável"""
+
+    __slots__ = ('variants', 'etags', 'not_modified_headers', '_negotiated')
+
+    def __init__(self, payload: Any, fmt: Optional[str] = None):
+        """
+        Args:
+            payload: Conteúdo da rota
+            fmt: Formato negociado por Accept (response_formats); None se a rota não negocia
+        """
+        content_type = 'application/json; charset=utf-8'
+        if fmt in response_formats.CONTENT_TYPES:
+            content_type = response_formats.CONTENT_TYPES[fmt]
+            body = response_formats.encode(payload, fmt)
+        else:
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        vary = 'Accept-Encoding' if fmt is None else 'Accept, Accept-Encoding'
+        digest = hashlib.sha256(content_type.encode('utf-8') + body).hexdigest()[:32]
+
+        encoded = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if BROTLI_AVAILABLE:
+            encoded['br'] = brotli.compress(body, quality=11)
+
+        # Cada codificação é uma representação distinta, então tem seu próprio ETag forte
+        self.variants: Dict[str, Tuple[bytes, Headers]] = {}
+        for encoding, data in encoded.items():
+            if encoding != 'identity' and len(data) >= len(body):
+                continue
+            etag = f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"'
+            headers = [
+                ('Content-Type', content_type),
+                ('ETag', etag),
+                ('Cache-Control', CACHE_CONTROL),
+                ('Vary', vary)
+            ]
+            if encoding != 'identity':
+                headers.append(('Content-Encoding', encoding))
+            self.variants[encoding] = (data, headers)
+
+        self.etags: Dict[str, str] = {headers[1][1]: encoding for encoding, (_, headers) in self.variants.items()}
+        self.not_modified_headers: Dict[str, Headers] = {
+            encoding: [header for header in headers if header[0] != 'Content-Type']
+            for encoding, (_, headers) in self.variants.items()
+        }
+        self._negotiated: Dict[str, str] = {}
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Escolhe a codificação para um cabeçalho Accept-Encoding (memorizado por valor)"""
+        encoding = self._negotiated.get(accept_encoding)
+        if encoding is not None:
+            return encoding
+
+        # A melhor codificação comprimida aceita (q > 0); sem nenhuma, o corpo vai sem compressão
+        weights = _parse_accept_encoding(accept_encoding)
+        wildcard = weights.get('*', 0.0)
+        best, best_quality = 'identity', 0.0
+        for candidate in COMPRESSED_ENCODINGS:
+            if candidate not in self.variants:
+                continue
+            quality = weights.get(candidate, wildcard)
+            if quality > best_quality:
+                best, best_quality = candidate, quality
+
+        if len(self._negotiated) < NEGOTIATION_CACHE_SIZE:
+            self._negotiated[accept_encoding] = best
+        return best
+
+    def respond(self, request) -> Response:
+        """Monta a resposta (200 ou 304) sem serializar nem comprimir nada"""
+        encoding = self.negotiate(request.headers.get('Accept-Encoding', ''))
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            tags = _parse_if_none_match(if_none_match)
+            if '*' in tags or self.variants[encoding][1][1][1] in tags:
+                return Response(status=304, headers=self.not_modified_headers[encoding])
+            # O cliente guarda outra variante válida: o 304 descreve a variante que ele tem
+            for tag in tags:
+                if tag in self.etags:
+                    return Response(status=304, headers=self.not_modified_headers[self.etags[tag]])
+
+        data, headers = self.variants[encoding]
+        return Response(data, status=200, headers=headers)
@@ -0,0 +1,140 @@
+"""
+Ambiente vetorizado do Block Picker para avaliar estratégias sem o tabuleiro.
+Simula milhares de partidas em paralelo com arrays NumPy, usando o mesmo
+Board e as mesmas regras de `game_engine` (e portanto de game_manager.js).
+Estratégias compiladas em tabelas de movimentos (um código de ação por par
+jogador/recompensa) rodam aqui com `table_policy`, um acesso a array por tick.
+"""
+
+from typing import Callable, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+from game_engine import DIRECTIONS, FREE, Board
+
+# Ações são índices em DIRECTIONS; NOOP representa uma estratégia que retorna null
+ACTION_NAMES = list(DIRECTIONS)
+NOOP = len(ACTION_NAMES)
+
+
+class VectorEnv:
+    """Executa `num_envs` partidas independentes em lockstep, um tick por chamada de step()"""
+
+    def __init__(self, num_envs: int, board: Optional[Board] = None, seed: Optional[int] = None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("VectorEnv requer numpy (pip install numpy)")
+
+        self.num_envs = num_envs
+        self.board = board if board is not None else Board()
+        self.rng = np.random.default_rng(seed)
+
+        cols = self.board.cols
+        # Cópia das células: obstáculos colocados no Board depois daqui não afetam o ambiente
+        self.free = np.frombuffer(bytes(self.board.cells), dtype=np.uint8) == FREE
+        # Células livres em ordem de linha e a posição de cada uma nessa lista, para o sorteio
+        self.free_cells = np.flatnonzero(self.free)
+        self.free_rank = np.cumsum(self.free) - 1
+        # Deslocamentos por ação, com uma linha extra parada para NOOP
+        deltas = np.array(list(DIRECTIONS.values()) + [(0, 0)], dtype=np.int64)
+        self.dx = deltas[:, 0]
+        self.dy = deltas[:, 1]
+        self.cols = cols
+
+        self.px = np.empty(num_envs, dtype=np.int64)
+        self.py = np.empty(num_envs, dtype=np.int64)
+        self.bx = np.empty(num_envs, dtype=np.int64)
+        self.by = np.empty(num_envs, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.ticks = 0
+        self.reset()
+
+    def reset(self):
+        """Volta todas as partidas ao estado inicial: jogador no centro, recompensa sorteada"""
+        cx, cy = self.board.center()
+        self.px.fill(cx)
+        self.py.fill(cy)
+        self.score.fill(0)
+        self.ticks = 0
+        self._respawn(np.arange(self.num_envs))
+
+    def _respawn(self, envs):
+        """Sorteia novas recompensas (uniforme nas células livres, fora do jogador) para `envs`"""
+        k = self.rng.integers(0, len(self.free_cells) - 1, size=len(envs))
+        excluded = self.free_rank[self.py[envs] * self.cols + self.px[envs]]
+        k += k >= excluded
+        cells = self.free_cells[k]
+        self.bx[envs] = cells % self.cols
+        self.by[envs] = cells // self.cols
+
+    def step(self, actions):
+        """
+        Avança um tick em todas as partidas.
+
+        Args:
+            actions: Array de inteiros (índice em ACTION_NAMES ou NOOP) com uma ação por partida
+
+        Returns:
+            np.ndarray: Recompensa obtida no tick (0 ou 1) por partida
+        """
+        nx = self.px + self.dx[actions]
+        ny = self.py + self.dy[actions]
+        allowed = self.free[ny * self.cols + nx]
+        np.copyto(self.px, nx, where=allowed)
+        np.copyto(self.py, ny, where=allowed)
+
+        collected = (self.px == self.bx) & (self.py == self.by)
+        hits = np.flatnonzero(collected)
+        if hits.size:
+            self.score[hits] += 1
+            self._respawn(hits)
+        self.ticks += 1
+        return collected.astype(np.int64)
+
+    def evaluate(self, policy: Callable[['VectorEnv'], 'np.ndarray'], ticks: int):
+        """
+        Roda uma política vetorizada por `ticks` ticks a partir do estado inicial.
+
+        Args:
+            policy: Função que recebe o ambiente e retorna as ações de todas as partidas
+            ticks: Número de ticks por partida
+
+        Returns:
+            np.ndarray: Pontuação final de cada partida
+        """
+        self.reset()
+        for _ in range(ticks):
+            self.step(policy(self))
+        return self.score.copy()
+
+
+def greedy_policy(env: VectorEnv):
+    """Versão vetorizada da estratégia padrão: horizontal primeiro, depois vertical"""
+    actions = np.full(env.num_envs, NOOP, dtype=np.int64)
+    actions[env.by > env.py] = ACTION_NAMES.index('down')
+    actions[env.by < env.py] = ACTION_NAMES.index('up')
+    actions[env.bx > env.px] = ACTION_NAMES.index('right')
+    actions[env.bx < env.px] = ACTION_NAMES.index('left')
+    return actions
+
+
+def table_policy(codes: bytes, cols: int, rows: int) -> Callable[[VectorEnv], 'np.ndarray']:
+    """
+    Política vetorizada a partir de uma tabela de movimentos.
+
+    Args:
+        codes: Código de ação (índice em ACTION_NAMES ou NOOP) por par, indexado por
+            (célula do jogador) * cols * rows + (célula da recompensa)
+        cols, rows: Dimensões do tabuleiro da tabela
+    """
+    table = np.frombuffer(bytes(codes), dtype=np.uint8)
+    cells = cols * rows
+
+    def policy(env: VectorEnv):
+        return table[(env.py * cols + env.px) * cells + env.by * cols + env.bx]
+
+    return policy
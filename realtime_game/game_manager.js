@@ -11,6 +11,8 @@ const DIRECTIONS = {
     'left': [-1, 0], 
     'right': [1, 0] 
 };
+// Ordem dos códigos das tabelas de movimentos (o código DIRECTION_NAMES.length significa "parado")
+const DIRECTION_NAMES = Object.keys(DIRECTIONS);
 
 class GameManager {
     constructor() {
@@ -19,7 +21,9 @@ class GameManager {
         this.cols = WIDTH / BLOCK_SIZE;
         this.block_pos = this.randomBlock();
         this.aiStrategyFunction = null;
+        this.aiMoveTable = null;
         this.aiAgentSocketId = null;
+        this.tick = 0; // Ticks do loop do jogo, para medir pontos por tick
     }
     
     /**
@@ -93,6 +97,7 @@ class GameManager {
      * Atualiza o estado do jogo (colisões, pontuação, etc.)
      */
     update() {
+        this.tick++;
         for (const playerId in this.players) {
             const player = this.players[playerId];
             if (player.pos[0] === this.block_pos[0] && player.pos[1] === this.block_pos[1]) {
@@ -112,6 +117,7 @@ class GameManager {
         return {
             players: this.players,
             block_pos: [this.block_pos[0] * BLOCK_SIZE, this.block_pos[1] * BLOCK_SIZE],
+            tick: this.tick,
         };
     }
 
@@ -119,8 +125,19 @@ class GameManager {
      * Executa a estratégia da IA se disponível
      */
     executeAIStrategy() {
-        if (this.aiStrategyFunction && this.players['ai_agent_masp']) {
-            const aiPlayer = this.players['ai_agent_masp'];
+        const aiPlayer = this.players['ai_agent_masp'];
+        if (!aiPlayer) return;
+
+        if (this.aiMoveTable) {
+            // Tabela pré-compilada: um acesso ao array por tick
+            const cells = this.cols * this.rows;
+            const playerCell = aiPlayer.pos[1] * this.cols + aiPlayer.pos[0];
+            const rewardCell = this.block_pos[1] * this.cols + this.block_pos[0];
+            const move = DIRECTION_NAMES[this.aiMoveTable[playerCell * cells + rewardCell]];
+            if (move) {
+                this.movePlayer('ai_agent_masp', move);
+            }
+        } else if (this.aiStrategyFunction) {
             try {
                 const move = this.aiStrategyFunction(
                     { x: aiPlayer.pos[0], y: aiPlayer.pos[1] }, 
@@ -136,14 +153,15 @@ class GameManager {
     }
 
     /**
-     * Implanta uma nova estratégia para a IA
-     * @param {string} jsCode - Código JavaScript da estratégia
+     * Substitui o agente IA atual pelo socket que implantou a estratégia
      * @param {string} socketId - ID do socket que enviou a estratégia
-     * @returns {Object} Resultado da implantação
      */
-    deployAIStrategy(jsCode, socketId) {
-        console.log('🤖 Nova estratégia recebida do socket:', socketId);
-        
+    activateAIAgent(socketId) {
+        // Troca a quente: o mesmo agente reimplantando mantém o jogador, a posição e a pontuação
+        if (socketId === this.aiAgentSocketId && this.players['ai_agent_masp']) {
+            return;
+        }
+
         // Remove o socket que enviou a estratégia
         this.removePlayer(socketId);
         
@@ -153,19 +171,32 @@ class GameManager {
             console.log('🔄 Removendo agente antigo.');
         }
 
+        this.addPlayer('ai_agent_masp');
+        this.aiAgentSocketId = socketId;
+    }
+
+    /**
+     * Implanta uma nova estratégia para a IA
+     * @param {string} jsCode - Código JavaScript da estratégia
+     * @param {string} socketId - ID do socket que enviou a estratégia
+     * @returns {Object} Resultado da implantação
+     */
+    deployAIStrategy(jsCode, socketId) {
+        console.log('🤖 Nova estratégia recebida do socket:', socketId);
+
         try {
             // Cria a função da estratégia
-            this.aiStrategyFunction = new Function('playerPos', 'rewardPos', `
+            const strategyFunction = new Function('playerPos', 'rewardPos', `
                 const { x: px, y: py } = playerPos;
                 const { x: rx, y: ry } = rewardPos;
                 ${jsCode}
             `);
             
-            // Adiciona o agente IA
-            this.addPlayer('ai_agent_masp');
-            this.aiAgentSocketId = socketId;
+            this.activateAIAgent(socketId);
+            this.aiStrategyFunction = strategyFunction;
+            this.aiMoveTable = null;
             
-            console.log(`✅ Estratégia implantada. Agente MASP (${aiAgentSocketId}) está ativo.`);
+            console.log(`✅ Estratégia implantada. Agente MASP (${this.aiAgentSocketId}) está ativo.`);
             return { status: 'success' };
             
         } catch (error) {
@@ -174,11 +205,47 @@ class GameManager {
         }
     }
 
+    /**
+     * Implanta uma tabela de movimentos pré-compilada para a IA
+     * @param {Object} data - { table, cols, rows }: um código de direção por par (jogador, recompensa)
+     * @param {string} socketId - ID do socket que enviou a tabela
+     * @returns {Object} Resultado da implantação
+     */
+    deployAITable(data, socketId) {
+        console.log('🤖 Nova tabela de movimentos recebida do socket:', socketId);
+
+        const cells = this.cols * this.rows;
+        if (!data || data.cols !== this.cols || data.rows !== this.rows) {
+            return { status: 'failed', error: `Tabela deve ser para o tabuleiro ${this.cols}x${this.rows}` };
+        }
+        const table = data.table;
+        if (typeof table !== 'string' || table.length !== cells * cells) {
+            return { status: 'failed', error: `Tabela deve ter ${cells * cells} códigos` };
+        }
+
+        const moveTable = new Uint8Array(table.length);
+        for (let i = 0; i < table.length; i++) {
+            const code = table.charCodeAt(i) - 48;
+            if (code < 0 || code > DIRECTION_NAMES.length) {
+                return { status: 'failed', error: `Código inválido na posição ${i}` };
+            }
+            moveTable[i] = code;
+        }
+
+        this.activateAIAgent(socketId);
+        this.aiMoveTable = moveTable;
+        this.aiStrategyFunction = null;
+
+        console.log(`✅ Tabela implantada. Agente MASP (${this.aiAgentSocketId}) está ativo.`);
+        return { status: 'success' };
+    }
+
     /**
      * Limpa a estratégia da IA
      */
     clearAIStrategy() {
         this.aiStrategyFunction = null;
+        this.aiMoveTable = null;
         this.aiAgentSocketId = null;
         if (this.players['ai_agent_masp']) {
             this.removePlayer('ai_agent_masp');
@@ -198,7 +265,7 @@ class GameManager {
             totalPlayers: Object.keys(this.players).length,
             humanPlayers: humanPlayers.length,
             aiPlayers: aiPlayers.length,
-            hasAIStrategy: this.aiStrategyFunction !== null,
+            hasAIStrategy: this.aiStrategyFunction !== null || this.aiMoveTable !== null,
             blockPosition: this.block_pos,
             timestamp: new Date().toISOString()
         };
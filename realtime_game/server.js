@@ -79,6 +79,19 @@ io.on('connection', (socket) => {
         }
     });
 
+    // Handler para implantação de tabela de movimentos pré-compilada
+    socket.on('deploy_table', (data) => {
+        const result = gameManager.deployAITable(data, socket.id);
+        socket.emit('strategy_deployed', result);
+        
+        if (result.status === 'success') {
+            console.log('✅ Tabela de movimentos implantada com sucesso!');
+            io.emit('update_state', gameManager.getState());
+        } else {
+            console.log('❌ Falha ao implantar tabela:', result.error);
+        }
+    });
+
     // Handler para desconexão
     socket.on('disconnect', () => {
         console.log(`➖ Cliente desconectado: ${socket.id}`);
@@ -13,16 +13,20 @@ from threading import Thread
 class ServerManager:
     """Gerencia a inicialização e monitoramento dos servidores"""
     
-    def __init__(self):
+    def __init__(self, production: bool = False):
         self.processes = {}
         self.running = True
+        self.production = production
     
     def start_mcp_server(self):
         """Inicia o servidor MCP"""
         print("🔮 Iniciando servidor MCP (Oracle)...")
         try:
+            command = [sys.executable, "mcp_server/mcp_game_instance.py"]
+            if self.production:
+                command.append("--producao")
             process = subprocess.Popen(
-                [sys.executable, "mcp_server/mcp_game_instance.py"],
+                command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True
@@ -172,7 +176,8 @@ class ServerManager:
 
 def main():
     """Função principal"""
-    manager = ServerManager()
+    # --producao: Oráculo com vários workers e afinidade de sessão
+    manager = ServerManager(production='--producao' in sys.argv)
     try:
         manager.run()
     except Exception as e: